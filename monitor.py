@@ -3,44 +3,121 @@
 Monitor de recursos do AI Agents No-Code Tools
 """
 
+import argparse
+import asyncio
+import atexit
+from collections import deque
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
 import time
-import psutil
+from time import strftime, localtime
 import os
 import sys
-from datetime import datetime
 
-def get_server_status(base_url="http://localhost:8000"):
-    """Verifica o status do servidor"""
-    try:
-        response = requests.get(f"{base_url}/health", timeout=5)
-        return response.status_code == 200
-    except:
-        return False
+try:
+    import psutil
+except ImportError:
+    print("❌ Erro: psutil não está instalado")
+    print("💡 Instale com: pip install psutil")
+    sys.exit(1)
+
+# Sessão HTTP compartilhada: reaproveita a conexão (keep-alive) entre as verificações
+_SESSION = requests.Session()
+_SESSION.mount(
+    "http://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=4,
+        # Só repete falhas de conexão: um /ready travado deve aparecer como TIMEOUT
+        max_retries=Retry(total=2, read=False, backoff_factor=0.2),
+    ),
+)
+atexit.register(_SESSION.close)
+
+# Pool dedicado para as coletas independentes (recursos, processo e carga)
+_POOL = ThreadPoolExecutor(max_workers=3)
+
+# Resultados do /ready em que o servidor não respondeu
+_OFFLINE_STATUSES = ("TIMEOUT", "CONNECTION_ERROR")
+
+# Inicializa a amostragem de CPU: as chamadas seguintes com interval=None
+# retornam o uso desde a chamada anterior sem bloquear
+psutil.cpu_percent(interval=None)
+
+# A memória total não muda durante a execução
+_GIB = 1.0 / (1024**3)
+_MEM_TOTAL_GB = psutil.virtual_memory().total * _GIB
+
+_SEP = "=" * 60
+
+_LOAD_EMOJI = {
+    "OK": "🟢",
+    "BUSY": "🟡",
+    "TIMEOUT": "🔴",
+    "CONNECTION_ERROR": "🔴"
+}
+
+# As variáveis de ambiente não mudam durante a execução
+_CONFIG_BLOCK = (
+    "\n⚙️  CONFIGURAÇÕES:\n"
+    "   MAX_CPU_THREADS: {}\n"
+    "   CPU_USAGE_LIMIT: {}\n"
+    "   MAX_CONCURRENT_TTS: {}\n"
+    "   MAX_CONCURRENT_VIDEO: {}\n"
+).format(
+    os.environ.get('MAX_CPU_THREADS', '4 (padrão)'),
+    os.environ.get('CPU_USAGE_LIMIT', '0.7 (padrão)'),
+    os.environ.get('MAX_CONCURRENT_TTS', '2 (padrão)'),
+    os.environ.get('MAX_CONCURRENT_VIDEO', '1 (padrão)'),
+)
+
+class SystemResources(NamedTuple):
+    cpu_percent: float
+    memory_percent: float
+    memory_available_gb: float
+    memory_total_gb: float
 
 def get_system_resources():
     """Obtém informações dos recursos do sistema"""
-    cpu_percent = psutil.cpu_percent(interval=1)
+    cpu_percent = psutil.cpu_percent(interval=None)
     memory = psutil.virtual_memory()
     
-    return {
-        "cpu_percent": cpu_percent,
-        "memory_percent": memory.percent,
-        "memory_available_gb": memory.available / (1024**3),
-        "memory_total_gb": memory.total / (1024**3)
-    }
+    return SystemResources(
+        cpu_percent=cpu_percent,
+        memory_percent=memory.percent,
+        memory_available_gb=memory.available * _GIB,
+        memory_total_gb=_MEM_TOTAL_GB,
+    )
+
+class ProcessResources(NamedTuple):
+    pid: int
+    cpu_percent: float
+    memory_rss_gb: float
+    num_threads: int
+
+def get_process_resources(process):
+    """Obtém os recursos usados pelo processo do servidor"""
+    if process is None:
+        return None
+    try:
+        # oneshot() lê /proc/<pid> uma única vez para todos os atributos
+        with process.oneshot():
+            return ProcessResources(
+                pid=process.pid,
+                cpu_percent=process.cpu_percent(interval=None),
+                memory_rss_gb=process.memory_info().rss * _GIB,
+                num_threads=process.num_threads(),
+            )
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
 
 def test_server_load(base_url="http://localhost:8000"):
-    """Testa a carga do servidor com uma requisição TTS"""
+    """Consulta a disponibilidade do servidor sem gerar trabalho real"""
     try:
-        response = requests.post(
-            f"{base_url}/api/v1/media/audio-tools/tts/kokoro",
-            data={
-                "text": "teste de monitoramento",
-                "voice": "af_heart"
-            },
-            timeout=10
-        )
+        response = _SESSION.get(f"{base_url}/ready", timeout=5)
         
         if response.status_code == 429:
             return "BUSY"
@@ -48,63 +125,163 @@ def test_server_load(base_url="http://localhost:8000"):
             return "OK"
         else:
             return f"ERROR_{response.status_code}"
-    except requests.exceptions.Timeout:
+    except requests.Timeout:
         return "TIMEOUT"
-    except:
+    except requests.RequestException:
         return "CONNECTION_ERROR"
 
-def print_status(status, resources):
+async def collect_status(process=None):
+    """Coleta recursos e carga do servidor em paralelo"""
+    loop = asyncio.get_running_loop()
+    resources, process_resources, load_status = await asyncio.gather(
+        loop.run_in_executor(_POOL, get_system_resources),
+        loop.run_in_executor(_POOL, get_process_resources, process),
+        loop.run_in_executor(_POOL, test_server_load),
+    )
+    # A resposta do /ready do próprio ciclo indica se o servidor está no ar
+    server_online = load_status not in _OFFLINE_STATUSES
+    return resources, process_resources, server_online, load_status
+
+def print_status(server_online, load_status, resources, process_resources=None):
     """Imprime o status formatado"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = strftime("%Y-%m-%d %H:%M:%S", localtime())
     
-    print(f"\n{'='*60}")
-    print(f"🕐 {timestamp}")
-    print(f"{'='*60}")
+    lines = ["", _SEP, f"🕐 {timestamp}", _SEP]
     
     # Status do servidor
-    server_online = get_server_status()
-    print(f"🖥️  Servidor: {'🟢 ONLINE' if server_online else '🔴 OFFLINE'}")
+    lines.append(f"🖥️  Servidor: {'🟢 ONLINE' if server_online else '🔴 OFFLINE'}")
     
     if server_online:
-        load_status = test_server_load()
-        load_emoji = {
-            "OK": "🟢",
-            "BUSY": "🟡", 
-            "TIMEOUT": "🔴",
-            "CONNECTION_ERROR": "🔴"
-        }
-        print(f"⚡ Carga: {load_emoji.get(load_status, '🔴')} {load_status}")
+        lines.append(f"⚡ Carga: {_LOAD_EMOJI.get(load_status, '🔴')} {load_status}")
     
     # Recursos do sistema
-    print(f"\n📊 RECURSOS DO SISTEMA:")
-    print(f"   CPU: {resources['cpu_percent']:.1f}%")
-    print(f"   Memória: {resources['memory_percent']:.1f}% " +
-          f"({resources['memory_available_gb']:.1f}GB livre de {resources['memory_total_gb']:.1f}GB)")
+    lines.append("\n📊 RECURSOS DO SISTEMA:")
+    lines.append(f"   CPU: {resources.cpu_percent:.1f}%")
+    lines.append(f"   Memória: {resources.memory_percent:.1f}% "
+                 f"({resources.memory_available_gb:.1f}GB livre de {resources.memory_total_gb:.1f}GB)")
+    
+    if process_resources:
+        lines.append(f"\n🔎 PROCESSO DO SERVIDOR (PID {process_resources.pid}):")
+        lines.append(f"   CPU: {process_resources.cpu_percent:.1f}%")
+        lines.append(f"   Memória (RSS): {process_resources.memory_rss_gb:.2f}GB")
+        lines.append(f"   Threads: {process_resources.num_threads}")
     
     # Avisos
-    if resources['cpu_percent'] > 80:
-        print(f"⚠️  AVISO: CPU alta ({resources['cpu_percent']:.1f}%)")
+    if resources.cpu_percent > 80:
+        lines.append(f"⚠️  AVISO: CPU alta ({resources.cpu_percent:.1f}%)")
     
-    if resources['memory_percent'] > 85:
-        print(f"⚠️  AVISO: Memória alta ({resources['memory_percent']:.1f}%)")
+    if resources.memory_percent > 85:
+        lines.append(f"⚠️  AVISO: Memória alta ({resources.memory_percent:.1f}%)")
     
     # Configurações atuais
-    print(f"\n⚙️  CONFIGURAÇÕES:")
-    print(f"   MAX_CPU_THREADS: {os.environ.get('MAX_CPU_THREADS', '4 (padrão)')}")
-    print(f"   CPU_USAGE_LIMIT: {os.environ.get('CPU_USAGE_LIMIT', '0.7 (padrão)')}")
-    print(f"   MAX_CONCURRENT_TTS: {os.environ.get('MAX_CONCURRENT_TTS', '2 (padrão)')}")
-    print(f"   MAX_CONCURRENT_VIDEO: {os.environ.get('MAX_CONCURRENT_VIDEO', '1 (padrão)')}")
+    lines.append(_CONFIG_BLOCK)
+    
+    sys.stdout.write("\n".join(lines))
+    sys.stdout.flush()
+
+POLL_INTERVAL = 30.0  # Intervalo padrão: 30 segundos
+MIN_POLL_INTERVAL = 5.0  # Intervalo durante incidentes
+MAX_POLL_INTERVAL = 300.0  # Intervalo máximo com o servidor estável
+POLL_BACKOFF = 1.5
+FAST_POLL_TICKS = 3  # Verificações rápidas após um incidente
+
+def next_poll_interval(history, interval):
+    """Calcula o próximo intervalo a partir dos últimos status observados"""
+    recent = list(history)[-FAST_POLL_TICKS:]
+    if any(status != "OK" for status in recent):
+        # Incidente recente: verifica com frequência até estabilizar
+        return MIN_POLL_INTERVAL
+    if len(history) == history.maxlen and all(status == "OK" for status in history):
+        # Servidor estável: aumenta o intervalo gradualmente
+        return min(max(interval, POLL_INTERVAL) * POLL_BACKOFF, MAX_POLL_INTERVAL)
+    return POLL_INTERVAL
+
+def start_metrics_server(address):
+    """Expõe as métricas no formato de texto do Prometheus (ex.: ':9101')"""
+    try:
+        from prometheus_client import Counter, Gauge, start_http_server
+    except ImportError:
+        print("❌ Erro: prometheus_client não está instalado")
+        print("💡 Instale com: pip install prometheus_client")
+        sys.exit(1)
+
+    host, _, port = address.rpartition(":")
+    start_http_server(int(port), addr=host or "0.0.0.0")
+    print(f"📈 Métricas Prometheus em http://{host or '0.0.0.0'}:{port}/metrics")
+
+    return {
+        "cpu_percent": Gauge("monitor_cpu_percent", "Uso de CPU do sistema (%)"),
+        "memory_percent": Gauge("monitor_mem_percent", "Uso de memória do sistema (%)"),
+        "memory_available_gb": Gauge("monitor_mem_available_gb", "Memória disponível (GB)"),
+        "server_up": Gauge("monitor_server_up", "Servidor respondendo (1) ou não (0)"),
+        "server_busy": Gauge("monitor_server_busy", "Servidor sem capacidade para novas tarefas"),
+        "process_cpu_percent": Gauge("monitor_process_cpu_percent", "Uso de CPU do processo do servidor (%)"),
+        "process_rss_gb": Gauge("monitor_process_rss_gb", "Memória residente do processo do servidor (GB)"),
+        "probe_errors": Counter("monitor_probe_errors_total", "Verificações com erro, timeout ou servidor offline"),
+    }
+
+def record_metrics(metrics, server_online, load_status, resources, process_resources=None):
+    """Atualiza as métricas expostas com o resultado do ciclo"""
+    metrics["cpu_percent"].set(resources.cpu_percent)
+    if process_resources:
+        metrics["process_cpu_percent"].set(process_resources.cpu_percent)
+        metrics["process_rss_gb"].set(process_resources.memory_rss_gb)
+    metrics["memory_percent"].set(resources.memory_percent)
+    metrics["memory_available_gb"].set(resources.memory_available_gb)
+    metrics["server_up"].set(1 if server_online else 0)
+    metrics["server_busy"].set(1 if load_status == "BUSY" else 0)
+    if not server_online or load_status not in ("OK", "BUSY"):
+        metrics["probe_errors"].inc()
+
+async def monitor_loop(metrics=None, process=None):
+    """Loop de monitoramento"""
+    history = deque(maxlen=5)
+    interval = POLL_INTERVAL
+    next_tick = time.monotonic()
+    while True:
+        resources, process_resources, server_online, load_status = await collect_status(process)
+        print_status(server_online, load_status, resources, process_resources)
+        if metrics:
+            record_metrics(metrics, server_online, load_status, resources, process_resources)
+
+        history.append(load_status if server_online else "OFFLINE")
+        interval = next_poll_interval(history, interval)
+
+        # Dorme apenas o restante do intervalo para manter a cadência estável;
+        # se o ciclo atrasou, recomeça a contagem em vez de acumular atrasos
+        next_tick += interval
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            next_tick = time.monotonic()
 
 def main():
     """Função principal"""
+    parser = argparse.ArgumentParser(description="Monitor de recursos do AI Agents No-Code Tools")
+    parser.add_argument(
+        "--serve",
+        metavar="[HOST]:PORT",
+        help="Expõe as métricas no formato Prometheus (ex.: --serve :9101)",
+    )
+    parser.add_argument(
+        "--pid",
+        type=int,
+        help="PID do processo do servidor para monitorar CPU e memória do processo",
+    )
+    args = parser.parse_args()
+
     print("🚀 AI Agents No-Code Tools - Monitor de Recursos")
     print("📡 Monitorando servidor... (Ctrl+C para parar)")
     
     try:
-        while True:
-            resources = get_system_resources()
-            print_status("monitoring", resources)
-            time.sleep(30)  # Atualiza a cada 30 segundos
+        metrics = start_metrics_server(args.serve) if args.serve else None
+        process = None
+        if args.pid:
+            # O mesmo objeto é reutilizado para que cpu_percent meça o intervalo entre ciclos
+            process = psutil.Process(args.pid)
+            process.cpu_percent(interval=None)
+        asyncio.run(monitor_loop(metrics, process))
             
     except KeyboardInterrupt:
         print("\n\n👋 Monitor finalizado pelo usuário")
@@ -114,12 +291,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    # Verificar se psutil está instalado
-    try:
-        import psutil
-    except ImportError:
-        print("❌ Erro: psutil não está instalado")
-        print("💡 Instale com: pip install psutil")
-        sys.exit(1)
-    
     main() 
\ No newline at end of file
@@ -1,51 +1,193 @@
-from fastapi import FastAPI, status, APIRouter, UploadFile, File, Form, BackgroundTasks
-from fastapi.responses import JSONResponse, StreamingResponse, HTMLResponse, Response
+from fastapi import FastAPI, status, APIRouter, UploadFile, File, Form, Request
+from fastapi.responses import ORJSONResponse, FileResponse, HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
 from typing import Literal, Optional
+from urllib.parse import quote
+from email.utils import parsedate_to_datetime
+from functools import lru_cache, partial
 import os
+import uuid
+import hashlib
+import time
 import signal
+import tempfile
+import shutil
 import sys
 import asyncio
+import threading
 from asyncio import Semaphore
+from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
-from video.tts import TTS
+import httpx
+import orjson
+# video.config primeiro: define OMP/MKL_NUM_THREADS antes de qualquer import do torch
+from video.config import device
+from video.tts import TTS, LANGUAGE_VOICE_MAP, LANGUAGE_VOICE_CONFIG
 from video.stt import STT
+from video.align import Aligner
 from video.storage import Storage
 from video.caption import Caption
 from video.media import MediaUtils
 from video.builder import VideoBuilder
-from video.config import device
+from video.quality_settings import get_quality_preset, WHISPER_BEAM_SIZE, SUBTITLE_CAPTION_MAX_CHARS
 
-CHUNK_SIZE = 1024 * 1024 * 10  # 10MB chunks
+# Downloads: quando atrás do nginx, delega o envio do arquivo via X-Accel-Redirect
+USE_X_ACCEL = os.environ.get("USE_X_ACCEL", "false").lower() in ("1", "true", "yes")
+X_ACCEL_PREFIX = os.environ.get("X_ACCEL_PREFIX", "/_protected").rstrip("/")
+
+# Tamanho máximo aceito para uploads (multipart ou via URL)
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(2 << 30)))  # 2GB
+
+# Cliente HTTP compartilhado para uploads via URL (reaproveita conexões)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+http_client = httpx.AsyncClient(
+    timeout=60,
+    follow_redirects=True,
+    limits=httpx.Limits(max_keepalive_connections=32),
+)
 
 # OTIMIZAÇÃO: Sistema de controle de concorrência
 MAX_CONCURRENT_TTS = int(os.environ.get("MAX_CONCURRENT_TTS", "4"))  # Máximo 4 TTS simultâneos
 MAX_CONCURRENT_VIDEO = int(os.environ.get("MAX_CONCURRENT_VIDEO", "2"))  # Máximo 2 vídeos simultâneos
 MAX_CONCURRENT_HEAVY_TASKS = int(os.environ.get("MAX_CONCURRENT_HEAVY_TASKS", "6"))  # Total de tarefas pesadas
 
-# Semáforos para controlar concorrência
+# Semáforos para controlar concorrência. Ordem de aquisição fixa em todos os
+# jobs para evitar deadlock: heavy_tasks_semaphore primeiro, depois tts/video
 tts_semaphore = Semaphore(MAX_CONCURRENT_TTS)
 video_semaphore = Semaphore(MAX_CONCURRENT_VIDEO)
 heavy_tasks_semaphore = Semaphore(MAX_CONCURRENT_HEAVY_TASKS)
 
+# Fila de jobs pesados: WORKER_CONCURRENCY workers consomem uma fila limitada;
+# com a fila cheia as requisições recebem 429
+WORKER_CONCURRENCY = int(os.environ.get("WORKER_CONCURRENCY", str(MAX_CONCURRENT_HEAVY_TASKS)))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", str(MAX_CONCURRENT_HEAVY_TASKS * 2)))
+
+# Executor padrão do loop (metadados, limpeza, preload) com teto explícito
+EXECUTOR_WORKERS = int(os.environ.get("EXECUTOR_WORKERS", str(min(8, os.cpu_count() or 4))))
+
+# Pools dedicados para o trabalho pesado, dimensionados pelos semáforos, para que
+# TTS/STT e ffmpeg não ocupem as threads usadas pelo resto do servidor
+tts_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_TTS, thread_name_prefix="tts")
+video_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_VIDEO, thread_name_prefix="video")
+
+# Cores só em terminal; enqueue=True tira a escrita no stdout do event loop
 logger.remove()
 logger.add(
     sys.stdout,
-    colorize=True,
+    colorize=sys.stdout.isatty(),
+    enqueue=True,
     format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level> | <blue>{extra}</blue>",
-    level="DEBUG",
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
 )
 
 logger.info("This server was created by the 'AI Agents A-Z' YouTube channel")
 logger.info("https://www.youtube.com/@aiagentsaz")
 logger.info("Using device: {}", device)
-logger.info("CPU Optimization: Max TTS: {}, Max Video: {}, Max Heavy Tasks: {}", 
-           MAX_CONCURRENT_TTS, MAX_CONCURRENT_VIDEO, MAX_CONCURRENT_HEAVY_TASKS)
+logger.info("CPU Optimization: Max TTS: {}, Max Video: {}, Max Heavy Tasks: {}, Executor workers: {}", 
+           MAX_CONCURRENT_TTS, MAX_CONCURRENT_VIDEO, MAX_CONCURRENT_HEAVY_TASKS, EXECUTOR_WORKERS)
+
+# Idiomas do Kokoro e idioma do Whisper por voz, calculados uma única vez
+KOKORO_LANGUAGES: tuple = tuple(LANGUAGE_VOICE_CONFIG.keys())
+VOICE_TO_WHISPER_LANG = {
+    voice: ("pt" if info.get("lang_code") == "p" else "en")
+    for voice, info in LANGUAGE_VOICE_MAP.items()
+}
+PT_VOICES = frozenset(voice for voice, lang in VOICE_TO_WHISPER_LANG.items() if lang == "pt")
+# Em voz inválida, a resposta aponta para a lista de vozes em vez de embuti-la
+KOKORO_VOICES_URL = "/api/v1/media/audio-tools/tts/kokoro/voices"
+# Tipos de mídia aceitos como fundo do vídeo legendado
+BACKGROUND_MEDIA_TYPES = frozenset({"image", "video"})
+
+# Carrega os modelos uma única vez por processo
+PRELOAD_MODELS = os.environ.get("PRELOAD_MODELS", "false").lower() in ("1", "true", "yes")
+# Legendas em português: alinha o texto do TTS ao áudio (CTC) em vez de transcrever com o Whisper
+USE_FORCED_ALIGNMENT = os.environ.get("USE_FORCED_ALIGNMENT", "false").lower() in ("1", "true", "yes")
+
+
+@lru_cache(maxsize=1)
+def get_tts() -> TTS:
+    return TTS()
+
+
+# Modelos Whisper por tamanho e o alinhador; o lock impede que o preload e um job
+# carreguem o mesmo modelo em paralelo (lru_cache não serializa chamadas concorrentes)
+_stt_models: dict = {}
+_aligner: Optional[Aligner] = None
+_models_lock = threading.Lock()
 
-def iterfile(path: str):
-    with open(path, mode="rb") as file:
-        while chunk := file.read(CHUNK_SIZE):
-            yield chunk
+
+def get_stt(model_size: str) -> STT:
+    stt = _stt_models.get(model_size)
+    if stt is None:
+        with _models_lock:
+            stt = _stt_models.get(model_size)
+            if stt is None:
+                stt = _stt_models[model_size] = STT(model_size=model_size)
+    return stt
+
+
+def get_aligner() -> Aligner:
+    global _aligner
+    if _aligner is None:
+        with _models_lock:
+            if _aligner is None:
+                _aligner = Aligner()
+    return _aligner
+
+
+# Caption não guarda estado entre chamadas: uma instância serve todos os jobs
+captions_manager = Caption()
+
+
+# Vozes do Kokoro são fixas: lista ordenada para resposta e frozenset para validação O(1)
+@lru_cache(maxsize=32)
+def kokoro_voices(lang_code: str = "") -> tuple:
+    return tuple(get_tts().valid_kokoro_voices(lang_code=lang_code))
+
+
+@lru_cache(maxsize=32)
+def kokoro_voice_set(lang_code: str = "") -> frozenset:
+    return frozenset(kokoro_voices(lang_code))
+
+
+# Jobs pesados rodam fora do ciclo da requisição, consumidos por um pool fixo
+# de workers; as referências das tasks são mantidas para que não sejam
+# coletadas pelo GC no meio da execução
+_job_queue: asyncio.Queue = asyncio.Queue(maxsize=JOB_QUEUE_SIZE)
+_worker_tasks: set = set()
+
+
+async def _job_worker() -> None:
+    while True:
+        job = await _job_queue.get()
+        try:
+            await job()
+        except Exception as e:
+            logger.error("Unhandled error in background job: {}", e)
+        finally:
+            _job_queue.task_done()
+
+
+async def run_in_pool(executor: ThreadPoolExecutor, func, *args, **kwargs):
+    """
+    Run a blocking call on a dedicated executor without blocking the event loop.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, partial(func, *args, **kwargs)
+    )
+
+
+def _enqueue_job(job) -> bool:
+    """
+    Queue a coroutine function for the worker pool.
+    Returns False when the queue is full.
+    """
+    try:
+        _job_queue.put_nowait(job)
+    except asyncio.QueueFull:
+        return False
+    return True
 
 
 def signal_handler(sig, frame):
@@ -55,47 +197,240 @@ def signal_handler(sig, frame):
 signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
-app = FastAPI()
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Recusa com 413 corpos de requisição maiores que max_bytes
+
+    Middleware ASGI puro: não envolve as respostas (downloads com Range seguem
+    direto) e conta os bytes recebidos, cobrindo uploads chunked sem
+    Content-Length além do cabeçalho declarado.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_bytes:
+                    await self.reject(scope, receive, send)
+                    return
+                break
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # Descarta a resposta que o app montar para o erro de leitura do corpo
+            if exceeded and not response_started:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            if response_started:
+                raise
+        if exceeded and not response_started:
+            await self.reject(scope, receive, send)
+
+    async def reject(self, scope, receive, send):
+        response = ORJSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"error": f"Request body too large. Maximum is {self.max_bytes} bytes."},
+        )
+        await response(scope, receive, send)
+
+
+app = FastAPI(default_response_class=ORJSONResponse)
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=MAX_UPLOAD_BYTES)
+
+
+@app.on_event("startup")
+async def limit_executor():
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix="jobs")
+    )
+
+
+@app.on_event("startup")
+async def start_job_workers():
+    for _ in range(WORKER_CONCURRENCY):
+        task = asyncio.create_task(_job_worker())
+        _worker_tasks.add(task)
+        task.add_done_callback(_worker_tasks.discard)
+
+
+def discard_task(task: Optional[asyncio.Task]):
+    """
+    Cancela uma task ainda pendente ou consome o resultado de uma já concluída
+
+    Evita tasks órfãs e avisos de "exception was never retrieved".
+    """
+    if task is None:
+        return
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        task.exception()
+
+
+def warm_up_models():
+    """
+    Carrega o Whisper e faz uma inferência curta de Kokoro + Whisper
+
+    A primeira inferência paga a inicialização de kernels/alocadores (CUDA,
+    MKL); fazê-la no startup evita esse custo na primeira requisição.
+    """
+    try:
+        stt = get_stt("medium")
+        with tempfile.TemporaryDirectory(dir=SCRATCH_DIR) as tmp_dir:
+            warmup_path = os.path.join(tmp_dir, "warmup.wav")
+            # Áudio de fala real: silêncio seria descartado pelo VAD do Whisper
+            get_tts().kokoro("Warming up the models.", warmup_path)
+            stt.transcribe(warmup_path, language="en")
+        logger.info("Model warm-up finished")
+    except Exception as e:
+        logger.warning(f"Model warm-up failed: {e}")
+
+
+# Referências às cargas em segundo plano até terminarem
+_preload_futures: set = set()
+
+
+def _log_preload_result(name: str, future: asyncio.Future):
+    _preload_futures.discard(future)
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Preload of {} failed: {}", name, future.exception())
+
+
+@app.on_event("startup")
+async def preload_models():
+    get_tts()
+    kokoro_voice_set()
+    if PRELOAD_MODELS:
+        # Whisper é pesado: carrega em uma thread para não atrasar o startup
+        logger.info("Preloading Whisper model in background")
+        loop = asyncio.get_running_loop()
+        preloads = {"Whisper warm-up": loop.run_in_executor(None, warm_up_models)}
+        if USE_FORCED_ALIGNMENT:
+            preloads["aligner"] = loop.run_in_executor(None, get_aligner)
+        for name, future in preloads.items():
+            future.add_done_callback(partial(_log_preload_result, name))
+            _preload_futures.add(future)
+
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    # Cancela os workers (e o job em andamento) antes de fechar cliente e pools
+    for task in list(_worker_tasks):
+        task.cancel()
+    await asyncio.gather(*_worker_tasks, return_exceptions=True)
+
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await http_client.aclose()
+
+
+@app.on_event("shutdown")
+async def shutdown_executors():
+    for executor in (tts_executor, video_executor):
+        executor.shutdown(wait=False, cancel_futures=True)
 
 @app.get("/health", tags=["Health Check"])
-def read_root():
+async def read_root():
     return {"status": "ok"}
 
 
+@app.get("/ready", tags=["Health Check"])
+async def read_ready():
+    """
+    Report whether the server can accept new heavy tasks, without doing any work.
+    """
+    queue_state = {"queued": _job_queue.qsize(), "queue_size": JOB_QUEUE_SIZE}
+    if _job_queue.full():
+        return ORJSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"status": "busy", **queue_state},
+        )
+    return {"status": "ready", **queue_state}
+
+
+
+
 
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "templates")
+STATIC_MAX_AGE = int(os.environ.get("STATIC_MAX_AGE", "3600"))
+
+# Template lido uma única vez no import; o CSS é servido pelo StaticFiles (ETag/304)
+try:
+    with open(os.path.join(TEMPLATES_DIR, "file_manager.html"), "rb") as f:
+        _FILE_MANAGER_HTML: Optional[bytes] = f.read()
+except FileNotFoundError:
+    _FILE_MANAGER_HTML = None
+_FILE_MANAGER_HEADERS = {
+    "ETag": f'"{hashlib.md5(_FILE_MANAGER_HTML, usedforsecurity=False).hexdigest()}"',
+    "Cache-Control": f"public, max-age={STATIC_MAX_AGE}",
+} if _FILE_MANAGER_HTML is not None else {}
 
 
 @app.get("/files", response_class=HTMLResponse, tags=["File Manager"])
-def file_manager():
+async def file_manager(request: Request):
     """
     Web interface for file management.
     """
-    template_path = os.path.join(os.path.dirname(__file__), "templates", "file_manager.html")
-    try:
-        with open(template_path, "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
-        return HTMLResponse(content="""
-        <html>
-            <body>
-                <h1>Erro: Template não encontrado</h1>
-                <p>Template file not found. Please check if the file templates/file_manager.html exists</p>
-            </body>
-        </html>
-        """, status_code=404)
-
-
-@app.get("/templates/file_manager.css", tags=["File Manager"])
-def serve_file_manager_css():
+    if _FILE_MANAGER_HTML is not None:
+        if _FILE_MANAGER_HEADERS["ETag"] in [
+            tag.strip() for tag in request.headers.get("if-none-match", "").split(",")
+        ]:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_FILE_MANAGER_HEADERS)
+        return HTMLResponse(content=_FILE_MANAGER_HTML, headers=_FILE_MANAGER_HEADERS)
+    return HTMLResponse(content="""
+    <html>
+        <body>
+            <h1>Erro: Template não encontrado</h1>
+            <p>Template file not found. Please check if the file templates/file_manager.html exists</p>
+        </body>
+    </html>
+    """, status_code=404)
+
+
+class CachedStaticFiles(StaticFiles):
     """
-    Serve the CSS file for the file manager.
+    StaticFiles that also lets browsers cache the assets for a while.
     """
-    css_path = os.path.join(os.path.dirname(__file__), "templates", "file_manager.css")
-    try:
-        with open(css_path, "r", encoding="utf-8") as f:
-            return Response(content=f.read(), media_type="text/css")
-    except FileNotFoundError:
-        return Response(content="/* CSS file not found */", media_type="text/css", status_code=404)
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers.setdefault("Cache-Control", f"public, max-age={STATIC_MAX_AGE}")
+        return response
+
+
+app.mount("/templates", CachedStaticFiles(directory=TEMPLATES_DIR, check_dir=False), name="templates")
 
 
 api_router = APIRouter()
@@ -106,93 +441,114 @@ storage = Storage(
     storage_path=os.environ.get("STORAGE_PATH", os.path.abspath(os.path.join(os.path.dirname(__file__), "media")))
 )
 
+# Pasta de arquivos intermediários, criada uma única vez
+TEMP_FOLDER = os.path.join(storage.storage_path, "folders", "temp")
+os.makedirs(TEMP_FOLDER, exist_ok=True)
+# Downloads de URL ficam no mesmo filesystem do storage para serem movidos sem cópia
+DOWNLOAD_DIR = os.path.join(storage.storage_path, "tmp")
+# Arquivos de trabalho do vídeo legendado (áudio do TTS, legenda .ass) ficam fora
+# do storage; None usa o diretório temporário do sistema (TMPDIR ou /tmp)
+SCRATCH_DIR = os.environ.get("SCRATCH_DIR") or None
+
+
+def new_temp_asset(ext: str) -> tuple[str, str]:
+    """
+    Reserve a new intermediate file in the temp folder.
+
+    Returns:
+        tuple: (asset_id, file_path) where asset_id is a clean UUID
+    """
+    asset_id = str(uuid.uuid4())
+    return asset_id, os.path.join(TEMP_FOLDER, f"{asset_id}{ext}")
+
 
 @v1_media_api_router.get("/audio-tools/tts/kokoro/languages", tags=["TTS - Text to Speech"])
-def get_kokoro_languages():
+async def get_kokoro_languages():
     """
     Get available Kokoro languages.
     """
-    from video.tts import LANGUAGE_VOICE_CONFIG
-    languages = list(LANGUAGE_VOICE_CONFIG.keys())
-    return {"languages": languages}
+    return {"languages": KOKORO_LANGUAGES}
 
 
 @v1_media_api_router.get("/audio-tools/tts/kokoro/voices", tags=["TTS - Text to Speech"])
-def get_kokoro_voices(lang_code: Optional[str] = None):
+async def get_kokoro_voices(lang_code: Optional[str] = None):
     """
     Get available Kokoro voices.
     
     Args:
         lang_code: Language code (e.g., 'pt-br', 'en-us', 'pt'). If not provided, returns all voices.
     """
-    tts_manager = TTS()
-    voices = tts_manager.valid_kokoro_voices(lang_code=lang_code if lang_code else "")
+    # Códigos desconhecidos não passam pelo cache (a chave vem do cliente)
+    if lang_code and lang_code not in LANGUAGE_VOICE_CONFIG:
+        return {"voices": [], "language": lang_code}
+    voices = list(kokoro_voices(lang_code or ""))
     return {"voices": voices, "language": lang_code or "all"}
 
 
 @v1_media_api_router.post("/audio-tools/tts/kokoro", tags=["TTS - Text to Speech"])
 async def generate_kokoro_tts(
-    background_tasks: BackgroundTasks,
-    text: str = Form(..., description="Text to convert to speech"),
+    text: str = Form(..., min_length=1, description="Text to convert to speech"),
     voice: Optional[str] = Form(None, description="Voice name for kokoro TTS"),
-    speed: Optional[float] = Form(None, description="Speed for kokoro TTS"),
+    speed: Optional[float] = Form(None, gt=0, le=4, description="Speed for kokoro TTS"),
     name: Optional[str] = Form(None, description="Custom name for the audio file (optional)")
 ):
     """
     Generate audio from text using specified TTS engine.
     """
     # OTIMIZAÇÃO: Verificar se há capacidade para processar
-    if tts_semaphore.locked() or heavy_tasks_semaphore.locked():
-        return JSONResponse(
+    if _job_queue.full():
+        return ORJSONResponse(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             content={"error": "Server busy processing other TTS requests. Please try again later."},
         )
     
     if not voice:
         voice = "af_heart"
-    tts_manager = TTS()
-    voices = tts_manager.valid_kokoro_voices()
-    if voice not in voices:
-        return JSONResponse(
+    tts_manager = get_tts()
+    if voice not in kokoro_voice_set():
+        return ORJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
-            content={"error": f"Invalid voice: {voice}. Valid voices: {voices}"},
+            content={"error": f"Invalid voice: {voice}.", "voices_url": KOKORO_VOICES_URL},
         )
-    audio_id, audio_path = storage.create_media_filename_with_id(
+    audio_id, audio_path = await run_in_threadpool(
+        storage.create_media_filename_with_id,
         media_type="audio", file_extension=".wav", custom_name=name or ""
     )
-    tmp_file_id = storage.create_tmp_file(audio_id)
+    tmp_file_id = await run_in_threadpool(storage.create_tmp_file, audio_id)
 
     async def bg_task():
-        async with tts_semaphore:
-            async with heavy_tasks_semaphore:
-                logger.info("Starting Kokoro TTS processing for audio_id: {}", audio_id)
+        async with heavy_tasks_semaphore:
+            async with tts_semaphore:
+                logger.debug("Starting Kokoro TTS processing for audio_id: {}", audio_id)
                 try:
                     # Executar TTS em thread separada para não bloquear
-                    loop = asyncio.get_event_loop()
-                    await loop.run_in_executor(
-                        None,
-                        lambda: tts_manager.kokoro(
-                            text=text,
-                            output_path=audio_path,
-                            voice=voice,
-                            speed=int(speed) if speed else 1,
-                        )
+                    await run_in_pool(
+                        tts_executor,
+                        tts_manager.kokoro,
+                        text=text,
+                        output_path=audio_path,
+                        voice=voice,
+                        speed=speed if speed is not None else 1.0,
                     )
-                    logger.info("Completed Kokoro TTS processing for audio_id: {}", audio_id)
+                    logger.debug("Completed Kokoro TTS processing for audio_id: {}", audio_id)
                 except Exception as e:
                     logger.error("Error in Kokoro TTS processing: {}", e)
                 finally:
-                    storage.delete_media(tmp_file_id)
+                    await asyncio.to_thread(storage.delete_media_batch, [tmp_file_id])
 
-    background_tasks.add_task(bg_task)
+    if not _enqueue_job(bg_task):
+        await asyncio.to_thread(storage.delete_media_batch, [tmp_file_id])
+        return ORJSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"error": "Server busy processing other TTS requests. Please try again later."},
+        )
 
     return {"file_id": audio_id}
 
 
 @v1_media_api_router.post("/audio-tools/tts/chatterbox", tags=["TTS - Text to Speech"])
 async def generate_chatterbox_tts(
-    background_tasks: BackgroundTasks,
-    text: str = Form(..., description="Text to convert to speech"),
+    text: str = Form(..., min_length=1, description="Text to convert to speech"),
     sample_audio_id: Optional[str] = Form(
         None, description="Sample audio ID for voice cloning"
     ),
@@ -200,90 +556,160 @@ async def generate_chatterbox_tts(
         None, description="Sample audio file for voice cloning"
     ),
     exaggeration: Optional[float] = Form(
-        0.5, description="Exaggeration factor for voice cloning"
+        0.5, ge=0, le=2, description="Exaggeration factor for voice cloning"
     ),
-    cfg_weight: Optional[float] = Form(0.5, description="CFG weight for voice cloning"),
+    cfg_weight: Optional[float] = Form(0.5, ge=0, le=1, description="CFG weight for voice cloning"),
     temperature: Optional[float] = Form(
-        0.8, description="Temperature for voice cloning (default: 0.8)"
+        0.8, gt=0, le=5, description="Temperature for voice cloning (default: 0.8)"
     ),
 ):
     """
     Generate audio from text using Chatterbox TTS.
     """
     # OTIMIZAÇÃO: Verificar se há capacidade para processar
-    if tts_semaphore.locked() or heavy_tasks_semaphore.locked():
-        return JSONResponse(
+    if _job_queue.full():
+        return ORJSONResponse(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             content={"error": "Server busy processing other TTS requests. Please try again later."},
         )
     
-    tts_manager = TTS()
+    tts_manager = get_tts()
     
     # Create file in temp folder (intermediate file)
-    import uuid
-    asset_id = str(uuid.uuid4())
-    filename = f"{asset_id}.wav"
-    temp_folder_path = os.path.join(storage.storage_path, "folders", "temp")
-    os.makedirs(temp_folder_path, exist_ok=True)
-    audio_path = os.path.join(temp_folder_path, filename)
-    audio_id = f"folder_temp_audio_{filename}"
+    asset_id, audio_path = new_temp_asset(".wav")
+    audio_id = f"folder_temp_audio_{asset_id}.wav"
 
     sample_audio_path = None
     if sample_audio_file:
-        if not sample_audio_file.filename or not sample_audio_file.filename.endswith(".wav"):
-            return JSONResponse(
+        # Valida pelo cabeçalho RIFF/WAVE em vez da extensão do nome do arquivo
+        header = await sample_audio_file.read(12)
+        await sample_audio_file.seek(0)
+        if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return ORJSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"error": "Sample audio file must be a .wav file."},
             )
-        sample_audio_id = storage.upload_media(
+        sample_audio_id = await run_in_threadpool(
+            storage.upload_media_stream,
             media_type="audio",
-            media_data=sample_audio_file.file.read(),
+            file_stream=sample_audio_file.file,
             file_extension=".wav",
         )
-        sample_audio_path = storage.get_media_path(sample_audio_id)
+        sample_audio_path = await run_in_threadpool(storage.get_media_path, sample_audio_id)
     elif sample_audio_id:
-        if not storage.media_exists(sample_audio_id):
-            return JSONResponse(
+        if not await run_in_threadpool(storage.media_exists, sample_audio_id):
+            return ORJSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content={"error": f"Sample audio with ID {sample_audio_id} not found."},
             )
-        sample_audio_path = storage.get_media_path(sample_audio_id)
+        sample_audio_path = await run_in_threadpool(storage.get_media_path, sample_audio_id)
 
-    tmp_file_id = storage.create_tmp_file(audio_id)
+    tmp_file_id = await run_in_threadpool(storage.create_tmp_file, audio_id)
 
     async def bg_task():
-        async with tts_semaphore:
-            async with heavy_tasks_semaphore:
-                logger.info("Starting Chatterbox TTS processing for audio_id: {}", audio_id)
+        async with heavy_tasks_semaphore:
+            async with tts_semaphore:
+                logger.debug("Starting Chatterbox TTS processing for audio_id: {}", audio_id)
                 try:
                     if sample_audio_path:
                         # Executar TTS em thread separada para não bloquear
-                        loop = asyncio.get_event_loop()
-                        await loop.run_in_executor(
-                            None,
-                            lambda: tts_manager.chatterbox(
-                                text=text,
-                                output_path=audio_path,
-                                sample_audio_path=sample_audio_path,
-                                exaggeration=exaggeration or 0.5,
-                                cfg_weight=cfg_weight or 0.5,
-                                temperature=temperature or 0.8,
-                            )
+                        await run_in_pool(
+                            tts_executor,
+                            tts_manager.chatterbox,
+                            text=text,
+                            output_path=audio_path,
+                            sample_audio_path=sample_audio_path,
+                            exaggeration=exaggeration if exaggeration is not None else 0.5,
+                            cfg_weight=cfg_weight if cfg_weight is not None else 0.5,
+                            temperature=temperature if temperature is not None else 0.8,
                         )
-                    logger.info("Completed Chatterbox TTS processing for audio_id: {}", audio_id)
+                    logger.debug("Completed Chatterbox TTS processing for audio_id: {}", audio_id)
                 except Exception as e:
                     logger.error("Error in Chatterbox TTS processing: {}", e)
                 finally:
-                    storage.delete_media(tmp_file_id)
+                    await asyncio.to_thread(storage.delete_media_batch, [tmp_file_id])
 
-    background_tasks.add_task(bg_task)
+    if not _enqueue_job(bg_task):
+        await asyncio.to_thread(storage.delete_media_batch, [tmp_file_id])
+        return ORJSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"error": "Server busy processing other TTS requests. Please try again later."},
+        )
 
     return {"file_id": audio_id}
 
 
+async def _store_upload_stream(
+    file_stream, media_type: str, file_extension: str,
+    folder_path: Optional[str], name: Optional[str]
+) -> str:
+    if folder_path:
+        return await run_in_threadpool(
+            storage.upload_media_stream_to_folder,
+            media_type=media_type,
+            file_stream=file_stream,
+            file_extension=file_extension,
+            folder_path=folder_path,
+            custom_name=name or ""
+        )
+    return await run_in_threadpool(
+        storage.upload_media_stream,
+        media_type=media_type,
+        file_stream=file_stream,
+        file_extension=file_extension,
+        custom_name=name or ""
+    )
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def _remove_if_exists(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _download_and_store(
+    url: str, media_type: str, folder_path: Optional[str], name: Optional[str]
+) -> Optional[str]:
+    """
+    Stream a URL into a hidden temp file inside the storage and move it into
+    place (rename, no second copy). Returns None if the server did not answer 200.
+    Raises UploadTooLarge if the download exceeds MAX_UPLOAD_BYTES.
+    """
+    fd, tmp_path = await run_in_threadpool(tempfile.mkstemp, dir=DOWNLOAD_DIR, prefix=".download-")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            async with http_client.stream("GET", url) as response:
+                if response.status_code != 200:
+                    return None
+                received = 0
+                async for chunk in response.aiter_bytes(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    received += len(chunk)
+                    if received > MAX_UPLOAD_BYTES:
+                        raise UploadTooLarge(url)
+                    await run_in_threadpool(tmp.write, chunk)
+        # mkstemp cria com 0600; mesmas permissões de um arquivo enviado normalmente
+        await run_in_threadpool(os.chmod, tmp_path, 0o644)
+        return await run_in_threadpool(
+            storage.upload_media_from_path,
+            media_type=media_type,
+            source_path=tmp_path,
+            file_extension=os.path.splitext(url)[1],
+            folder_path=folder_path or "",
+            custom_name=name or "",
+        )
+    finally:
+        # Após o upload o arquivo já foi movido; só sobra em caso de erro
+        await run_in_threadpool(_remove_if_exists, tmp_path)
+
+
 @v1_media_api_router.post("/storage/{folder_path:path}", tags=["File Storage"])
 @v1_media_api_router.post("/storage", tags=["File Storage"])
-def upload_file(
+async def upload_file(
     folder_path: Optional[str] = None,
     file: Optional[UploadFile] = File(None, description="File to upload"),
     url: Optional[str] = Form(None, description="URL of the file to upload (optional)"),
@@ -299,86 +725,55 @@ def upload_file(
     Args:
         folder_path: Target folder path (nome real ou ID normalizado). Optional - if not provided, saves to default media folders.
     """
-    if media_type not in ["image", "video", "audio"]:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={"error": f"Invalid media type: {media_type}"},
-        )
-    
     if file:
-        if folder_path:
-            file_id = storage.upload_media_stream_to_folder(
-                media_type=media_type,
-                file_stream=file.file,
-                file_extension=os.path.splitext(file.filename or "")[1],
-                folder_path=folder_path,
-                custom_name=name or ""
-            )
-        else:
-            file_id = storage.upload_media_stream(
-                media_type=media_type,
-                file_stream=file.file,
-                file_extension=os.path.splitext(file.filename or "")[1],
-                custom_name=name or ""
-            )
-
+        file_id = await _store_upload_stream(
+            file.file,
+            media_type,
+            os.path.splitext(file.filename or "")[1],
+            folder_path,
+            name,
+        )
         return {"file_id": file_id}
     elif url:
         if not storage.is_valid_url(url):
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"error": f"Invalid URL: {url}"},
             )
-        file_extension = os.path.splitext(url)[1]
-        if name:
-            # Para URL, fazer download e upload com nome customizado
-            import requests
-            response = requests.get(url)
-            if response.status_code != 200:
-                return JSONResponse(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    content={"error": f"Failed to download media from {url}"}
-                )
-            if folder_path:
-                file_id = storage.upload_media_to_folder(
-                    media_type=media_type,
-                    media_data=response.content,
-                    file_extension=file_extension,
-                    folder_path=folder_path,
-                    custom_name=name
-                )
-            else:
-                file_id = storage.upload_media(
-                    media_type=media_type,
-                    media_data=response.content,
-                    file_extension=file_extension,
-                    custom_name=name
-                )
-        else:
-            # For URL without custom name
-            if folder_path:
-                import requests
-                response = requests.get(url)
-                if response.status_code != 200:
-                    return JSONResponse(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        content={"error": f"Failed to download media from {url}"}
-                    )
-                file_extension = os.path.splitext(url)[1]
-                file_id = storage.upload_media_to_folder(
-                    media_type=media_type,
-                    media_data=response.content,
-                    file_extension=file_extension,
-                    folder_path=folder_path
-                )
-            else:
-                file_id = storage.upload_media_from_url(media_type=media_type, url=url)
+        try:
+            file_id = await _download_and_store(url, media_type, folder_path, name)
+        except UploadTooLarge:
+            return ORJSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"error": f"Media at {url} is larger than {MAX_UPLOAD_BYTES} bytes."}
+            )
+        except httpx.HTTPError as e:
+            logger.error("Failed to download media", url=url, error=str(e))
+            file_id = None
+        if file_id is None:
+            return ORJSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"error": f"Failed to download media from {url}"}
+            )
         return {"file_id": file_id}
 
 
+def _json_with_etag(request: Request, payload) -> Response:
+    """
+    Serialize a JSON payload with a weak ETag and answer 304 when the
+    client already holds the same listing (If-None-Match).
+    """
+    body = orjson.dumps(payload)
+    etag = f'W/"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 # Specific endpoints FIRST (order matters in FastAPI!)
 @v1_media_api_router.get("/storage/list", tags=["File Storage"])
-def list_files(media_type: Optional[str] = None, limit: Optional[int] = None):
+async def list_files(request: Request, media_type: Optional[str] = None, limit: Optional[int] = None):
     """
     List stored files in the system.
     
@@ -387,33 +782,42 @@ def list_files(media_type: Optional[str] = None, limit: Optional[int] = None):
         limit: Limit number of results
     """
     try:
-        files = storage.list_media(media_type)
+        files = await run_in_threadpool(storage.list_media, media_type)
         
         if limit:
             files = files[:limit]
             
-        return {
+        return _json_with_etag(request, {
             "files": files,
             "total": len(files),
             "media_type_filter": media_type or "all"
-        }
+        })
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"error": f"Error listing files: {str(e)}"}
         )
 
 
+# Estatísticas varrem toda a árvore de mídia; guarda o resultado por alguns segundos
+STATS_CACHE_TTL = float(os.environ.get("STATS_CACHE_TTL", "5"))
+_stats_cache: dict = {"t": 0.0, "v": None}
+
+
 @v1_media_api_router.get("/storage/stats", tags=["File Storage"])
-def get_storage_stats():
+async def get_storage_stats(request: Request):
     """
     Get general storage statistics.
+    Results are cached for STATS_CACHE_TTL seconds.
     """
     try:
-        stats = storage.get_storage_stats()
-        return stats
+        now = time.monotonic()
+        if _stats_cache["v"] is None or now - _stats_cache["t"] > STATS_CACHE_TTL:
+            _stats_cache["v"] = await run_in_threadpool(storage.get_storage_stats)
+            _stats_cache["t"] = now
+        return _json_with_etag(request, _stats_cache["v"])
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"error": f"Error getting statistics: {str(e)}"}
         )
@@ -421,20 +825,20 @@ def get_storage_stats():
 
 # Endpoints with parameters AFTER
 @v1_media_api_router.get("/storage/{file_id}/info", tags=["File Storage"])
-def get_file_info(file_id: str):
+async def get_file_info(file_id: str):
     """
     Get detailed information about a specific file.
     """
     try:
-        info = storage.get_media_info(file_id)
+        info = await run_in_threadpool(storage.get_media_info, file_id)
         return info
     except FileNotFoundError:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
             content={"error": f"File {file_id} not found"}
         )
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"error": f"Error getting information: {str(e)}"}
         )
@@ -442,7 +846,7 @@ def get_file_info(file_id: str):
 
 @v1_media_api_router.get("/storage/{folder_path:path}/{file_id}/status", tags=["File Storage"])
 @v1_media_api_router.get("/storage/{file_id}/status", tags=["File Storage"])
-def file_status(file_id: str, folder_path: Optional[str] = None):
+async def file_status(file_id: str, folder_path: Optional[str] = None):
     """
     Check the status of a file by its ID.
     Works with UUID-only files in folders and old format files.
@@ -460,43 +864,101 @@ def file_status(file_id: str, folder_path: Optional[str] = None):
         # For files in default media folders, use the file_id as is
         expected_file_id = file_id
     
+    return {"status": await run_in_threadpool(_file_status, expected_file_id), "file_id": expected_file_id}
+
+
+def _file_status(file_id: str) -> str:
+    # Both checks in a single thread hop
     # Check if temporary file exists (processing)
-    tmp_id = storage.create_tmp_file_id(expected_file_id)
-    if storage.media_exists(tmp_id):
-        return {"status": "processing", "file_id": expected_file_id}
-    
+    if storage.media_exists(storage.create_tmp_file_id(file_id)):
+        return "processing"
     # Check if final file exists (ready)
-    elif storage.media_exists(expected_file_id):
-        return {"status": "ready", "file_id": expected_file_id}
-    
+    if storage.media_exists(file_id):
+        return "ready"
     # File not found
-    return {"status": "not_found", "file_id": expected_file_id}
+    return "not_found"
+
+
+def _is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since against the file validators.
+    If-None-Match takes precedence, as in RFC 9110.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(if_modified_since).timestamp() >= int(mtime)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _attachment_disposition(filename: str) -> str:
+    """
+    Content-Disposition de download, no mesmo formato do FileResponse:
+    filename entre aspas e filename* (RFC 5987) quando o nome não é ASCII simples
+    """
+    quoted = quote(filename)
+    if quoted == filename:
+        return f'attachment; filename="{filename}"'
+    fallback = filename.encode("ascii", "replace").decode("ascii")
+    fallback = fallback.replace("\\", "\\\\").replace('"', '\\"')
+    return f"attachment; filename=\"{fallback}\"; filename*=utf-8''{quoted}"
 
 
 @v1_media_api_router.get("/storage/{file_id}", tags=["File Storage"])
-def download_file(file_id: str):
+async def download_file(file_id: str, request: Request):
     """
     Download a file by its ID.
+    Supports HTTP Range requests for seeking and resuming, and
+    conditional GETs (ETag / Last-Modified) answered with 304.
     """
-    if not storage.media_exists(file_id):
-        return JSONResponse(
+    if not await run_in_threadpool(storage.media_exists, file_id):
+        return ORJSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
             content={"error": f"File with ID {file_id} not found."},
         )
 
-    file_path = storage.get_media_path(file_id)
-    return StreamingResponse(
-        iterfile(file_path),
+    file_path = await run_in_threadpool(storage.get_media_path, file_id)
+    if USE_X_ACCEL:
+        # nginx serves the file itself (sendfile) from an internal location
+        # mapped to the storage path
+        rel_path = os.path.relpath(file_path, storage.storage_path)
+        return Response(
+            headers={
+                "X-Accel-Redirect": f"{X_ACCEL_PREFIX}/{quote(rel_path)}",
+                "Content-Disposition": _attachment_disposition(os.path.basename(file_path)),
+                "Content-Type": "application/octet-stream",
+            },
+        )
+    # FileResponse responde a Range (206/416) e envia Accept-Ranges: bytes,
+    # permitindo seek e retomada de downloads de áudio/vídeo
+    stat_result = await run_in_threadpool(os.stat, file_path)
+    response = FileResponse(
+        file_path,
         media_type="application/octet-stream",
-        headers={
-            "Content-Disposition": f"attachment; filename={os.path.basename(file_path)}"
-        },
+        filename=os.path.basename(file_path),
+        stat_result=stat_result,
+        headers={"Cache-Control": "private, max-age=0, must-revalidate"},
     )
+    if _is_not_modified(request, response.headers["etag"], stat_result.st_mtime):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={
+                key: response.headers[key]
+                for key in ("etag", "last-modified", "cache-control")
+            },
+        )
+    return response
 
 
 @v1_media_api_router.delete("/storage/{folder_path:path}/{file_id}", tags=["File Storage"])
 @v1_media_api_router.delete("/storage/{file_id}", tags=["File Storage"])
-def delete_file(file_id: str, folder_path: Optional[str] = None):
+async def delete_file(file_id: str, folder_path: Optional[str] = None):
     """
     Delete a file by its ID.
     Works with UUID-only files in folders and old format files.
@@ -514,11 +976,10 @@ def delete_file(file_id: str, folder_path: Optional[str] = None):
         # For files in default media folders, use the file_id as is
         expected_file_id = file_id
     
-    if storage.media_exists(expected_file_id):
-        storage.delete_media(expected_file_id)
+    if await run_in_threadpool(storage.delete_media_batch, [expected_file_id]):
         return {"status": "success", "file_id": expected_file_id}
     else:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
             content={"error": f"File {expected_file_id} not found"}
         )
@@ -527,7 +988,7 @@ def delete_file(file_id: str, folder_path: Optional[str] = None):
 # ==================== FOLDER MANAGEMENT ENDPOINTS ====================
 
 @v1_media_api_router.get("/folders", tags=["Folder Management"])
-def list_folders(parent_folder: Optional[str] = None):
+async def list_folders(parent_folder: Optional[str] = None):
     """
     List folders in the system.
     
@@ -535,21 +996,21 @@ def list_folders(parent_folder: Optional[str] = None):
         parent_folder: Parent folder path to list subfolders
     """
     try:
-        folders = storage.list_folders(parent_folder or "")
+        folders = await run_in_threadpool(storage.list_folders, parent_folder or "")
         return {
             "folders": folders,
             "parent_folder": parent_folder or "",
             "total": len(folders)
         }
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"error": f"Error listing folders: {str(e)}"}
         )
 
 
 @v1_media_api_router.post("/folders", tags=["Folder Management"])
-def create_folder(
+async def create_folder(
     folder_name: str = Form(..., description="Name of the folder to create"),
     parent_folder: Optional[str] = Form("", description="Parent folder path")
 ):
@@ -561,7 +1022,7 @@ def create_folder(
         parent_folder: Parent folder path (optional)
     """
     try:
-        created = storage.create_folder(folder_name, parent_folder or "")
+        created = await run_in_threadpool(storage.create_folder, folder_name, parent_folder or "")
         if created:
             return {
                 "success": True,
@@ -570,24 +1031,24 @@ def create_folder(
                 "parent_folder": parent_folder or ""
             }
         else:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"error": f"Folder '{folder_name}' already exists"}
             )
     except ValueError as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"error": str(e)}
         )
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"error": f"Error creating folder: {str(e)}"}
         )
 
 
 @v1_media_api_router.delete("/folders/{folder_path:path}", tags=["Folder Management"])
-def delete_folder(folder_path: str):
+async def delete_folder(folder_path: str):
     """
     Delete a folder and all its contents.
     Accepts both real names and normalized folder IDs.
@@ -596,46 +1057,46 @@ def delete_folder(folder_path: str):
         folder_path: Path of the folder to delete (real name or normalized ID)
     """
     try:
-        deleted = storage.delete_folder(folder_path)
+        deleted = await run_in_threadpool(storage.delete_folder, folder_path)
         if deleted:
             return {
                 "success": True,
                 "message": f"Folder '{folder_path}' deleted successfully"
             }
         else:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content={"error": f"Folder '{folder_path}' not found"}
             )
     except ValueError as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"error": str(e)}
         )
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"error": f"Error deleting folder: {str(e)}"}
         )
 
 
 @v1_media_api_router.get("/folders/root/contents", tags=["Folder Management"])
-def get_root_folder_contents():
+async def get_root_folder_contents(request: Request):
     """
     Get contents of the root folder.
     """
     try:
-        contents = storage.list_folder_contents("")
-        return contents
+        contents = await run_in_threadpool(storage.list_folder_contents, "")
+        return _json_with_etag(request, contents)
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"error": f"Error getting root folder contents: {str(e)}"}
         )
 
 
 @v1_media_api_router.get("/folders/{folder_path:path}/contents", tags=["Folder Management"])
-def get_folder_contents(folder_path: str):
+async def get_folder_contents(folder_path: str, request: Request):
     """
     Get contents of a specific folder (subfolders and files).
     Accepts both real names and normalized folder IDs.
@@ -644,10 +1105,10 @@ def get_folder_contents(folder_path: str):
         folder_path: Path of the folder to explore (real name or normalized ID)
     """
     try:
-        contents = storage.list_folder_contents(folder_path)
-        return contents
+        contents = await run_in_threadpool(storage.list_folder_contents, folder_path)
+        return _json_with_etag(request, contents)
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"error": f"Error getting folder contents: {str(e)}"}
         )
@@ -658,13 +1119,12 @@ def get_folder_contents(folder_path: str):
 
 @v1_media_api_router.post("/video-tools/merge", tags=["Video Tools"])
 async def merge_videos(
-    background_tasks: BackgroundTasks,
     video_ids: str = Form(..., description="List of video IDs to merge"),
     background_music_id: Optional[str] = Form(
         None, description="Background music ID (optional)"
     ),
     background_music_volume: Optional[float] = Form(
-        0.5, description="Volume for background music (0.0 to 1.0)"
+        0.5, ge=0, le=1, description="Volume for background music (0.0 to 1.0)"
     ),
     name: Optional[str] = Form(None, description="Custom name for the merged video (optional)")
 ):
@@ -672,77 +1132,79 @@ async def merge_videos(
     Merge multiple videos into one.
     """
     # OTIMIZAÇÃO: Verificar se há capacidade para processar vídeo
-    if video_semaphore.locked() or heavy_tasks_semaphore.locked():
-        return JSONResponse(
+    if _job_queue.full():
+        return ORJSONResponse(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             content={"error": "Server busy processing other video tasks. Please try again later."},
         )
     
-    video_id_list = video_ids.split(",") if video_ids else []
+    video_id_list = [video_id for video_id in map(str.strip, video_ids.split(",")) if video_id]
     if not video_id_list:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"error": "At least one video ID is required."},
         )
 
-    merged_video_id, merged_video_path = storage.create_media_filename_with_id(
-        media_type="video", file_extension=".mp4", custom_name=name or ""
+    # Resolve os IDs em paralelo (cada lookup frio pode varrer a árvore de pastas)
+    unique_ids = list(dict.fromkeys(
+        video_id_list + ([background_music_id] if background_music_id else [])
+    ))
+    resolved = await asyncio.gather(
+        *(run_in_threadpool(storage.resolve_path, media_id) for media_id in unique_ids)
     )
-
-    video_paths = []
-    for video_id in video_id_list:
-        if not storage.media_exists(video_id):
-            return JSONResponse(
-                status_code=status.HTTP_404_NOT_FOUND,
-                content={"error": f"Video with ID {video_id} not found."},
-            )
-        video_paths.append(storage.get_media_path(video_id))
-
-    if background_music_id and not storage.media_exists(background_music_id):
-        return JSONResponse(
+    paths = dict(zip(unique_ids, resolved))
+    missing = [media_id for media_id, path in paths.items() if path is None]
+    if missing:
+        return ORJSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
-            content={
-                "error": f"Background music with ID {background_music_id} not found."
-            },
+            content={"error": f"Media not found: {', '.join(missing)}", "missing_ids": missing},
         )
-    background_music_path = (
-        storage.get_media_path(background_music_id) if background_music_id else None
+    video_paths = [paths[video_id] for video_id in video_id_list]
+    background_music_path = paths[background_music_id] if background_music_id else None
+
+    merged_video_id, merged_video_path = await run_in_threadpool(
+        storage.create_media_filename_with_id,
+        media_type="video", file_extension=".mp4", custom_name=name or ""
     )
 
     utils = MediaUtils()
 
-    temp_file_id = storage.create_tmp_file(merged_video_id)
+    temp_file_id = await run_in_threadpool(storage.create_tmp_file, merged_video_id)
 
     async def bg_task():
-        async with video_semaphore:
-            async with heavy_tasks_semaphore:
-                logger.info("Starting video merge processing for video_id: {}", merged_video_id)
+        async with heavy_tasks_semaphore:
+            async with video_semaphore:
+                logger.debug("Starting video merge processing for video_id: {}", merged_video_id)
                 try:
                     # Executar merge em thread separada para não bloquear
-                    loop = asyncio.get_event_loop()
-                    await loop.run_in_executor(
-                        None,
-                        lambda: utils.merge_videos(
-                            video_paths=video_paths,
-                            output_path=merged_video_path,
-                            background_music_path=background_music_path or "",
-                            background_music_volume=background_music_volume or 0.5,
-                        )
+                    await run_in_pool(
+                        video_executor,
+                        utils.merge_videos,
+                        video_paths=video_paths,
+                        output_path=merged_video_path,
+                        background_music_path=background_music_path or "",
+                        background_music_volume=(
+                            background_music_volume if background_music_volume is not None else 0.5
+                        ),
                     )
-                    logger.info("Completed video merge processing for video_id: {}", merged_video_id)
+                    logger.debug("Completed video merge processing for video_id: {}", merged_video_id)
                 except Exception as e:
                     logger.error("Error in video merge processing: {}", e)
                 finally:
-                    storage.delete_media(temp_file_id)
+                    await asyncio.to_thread(storage.delete_media_batch, [temp_file_id])
 
-    background_tasks.add_task(bg_task)
+    if not _enqueue_job(bg_task):
+        await asyncio.to_thread(storage.delete_media_batch, [temp_file_id])
+        return ORJSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"error": "Server busy processing other video tasks. Please try again later."},
+        )
 
     return {"file_id": merged_video_id}
 
 
 @v1_media_api_router.post("/video-tools/generate/tts-captioned-video", tags=["Video Tools"])
 async def generate_captioned_video(
-    background_tasks: BackgroundTasks,
     background_id: str = Form(..., description="Background image or video ID"),
     text: Optional[str] = Form(None, description="Text to generate video from"),
     width: Optional[int] = Form(1080, description="Width of the video (default: 1080)"),
@@ -756,7 +1218,10 @@ async def generate_captioned_video(
         "af_heart", description="Voice for kokoro TTS (default: af_heart)"
     ),
     kokoro_speed: Optional[float] = Form(
-        1.0, description="Speed for kokoro TTS (default: 1.0)"
+        1.0, gt=0, le=4, description="Speed for kokoro TTS (default: 1.0)"
+    ),
+    preset: Optional[Literal["fast", "balanced", "quality", "max_quality"]] = Form(
+        None, description="Caption quality preset; sets the Whisper beam size (default: WHISPER_BEAM_SIZE)"
     ),
     name: Optional[str] = Form(None, description="Custom name for the video (optional)")
 ):
@@ -767,43 +1232,47 @@ async def generate_captioned_video(
     For background videos: No zoom effect, just scales to fit dimensions
     """
     # OTIMIZAÇÃO: Verificar se há capacidade para processar vídeo + TTS
-    if video_semaphore.locked() or tts_semaphore.locked() or heavy_tasks_semaphore.locked():
-        return JSONResponse(
+    if _job_queue.full():
+        return ORJSONResponse(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             content={"error": "Server busy processing other heavy tasks. Please try again later."},
         )
     
-    if audio_id and not storage.media_exists(audio_id):
-        return JSONResponse(
+    # Resolve fundo e áudio em paralelo, uma única busca por ID
+    background_path, input_audio_path = await asyncio.gather(
+        run_in_threadpool(storage.resolve_path, background_id),
+        run_in_threadpool(storage.resolve_path, audio_id) if audio_id else asyncio.sleep(0),
+    )
+    if audio_id and input_audio_path is None:
+        return ORJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"error": f"Audio with ID {audio_id} not found."},
         )
-    ttsManager = TTS()  # Agora usa configurações otimizadas
-    if not audio_id and kokoro_voice not in ttsManager.valid_kokoro_voices():
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={"error": f"Invalid voice: {kokoro_voice}."},
-        )
-    media_type = storage.get_media_type(background_id)
-    if media_type not in ["image", "video"]:
-        return JSONResponse(
+    ttsManager = get_tts()  # Agora usa configurações otimizadas
+    if not audio_id and kokoro_voice not in kokoro_voice_set():
+        return ORJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
-            content={"error": f"Invalid media type: {media_type}. Must be 'image' or 'video'"},
+            content={"error": f"Invalid voice: {kokoro_voice}.", "voices_url": KOKORO_VOICES_URL},
         )
-    if not storage.media_exists(background_id):
-        return JSONResponse(
+    if background_path is None:
+        return ORJSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
             content={"error": f"Background image with ID {background_id} not found."},
         )
+    media_type = await run_in_threadpool(storage.get_media_type, background_id)
+    if media_type not in BACKGROUND_MEDIA_TYPES:
+        return ORJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": f"Invalid media type: {media_type}. Must be 'image' or 'video'"},
+        )
+
+    beam_size = get_quality_preset(preset)["whisper_beam_size"] if preset else WHISPER_BEAM_SIZE
+    # Idioma das legendas, derivado da voz uma única vez para os dois ramos
+    is_portuguese = kokoro_voice in PT_VOICES
+    whisper_language = "pt" if is_portuguese else "en"
 
     # Generate video in temp folder
-    import uuid
-    asset_id = str(uuid.uuid4())
-    video_filename = f"{asset_id}.mp4"
-    temp_folder_path = os.path.join(storage.storage_path, "folders", "temp")
-    os.makedirs(temp_folder_path, exist_ok=True)
-    output_path = os.path.join(temp_folder_path, video_filename)
-    output_id = asset_id  # Clean UUID for media ID
+    output_id, output_path = new_temp_asset(".mp4")  # Clean UUID for media ID
     
     dimensions = (width or 1080, height or 1920)
     builder = VideoBuilder(
@@ -811,139 +1280,159 @@ async def generate_captioned_video(
     )
     builder.set_media_utils(MediaUtils())
 
-    tmp_file_id = storage.create_tmp_file(output_id)
+    tmp_file_id = await run_in_threadpool(storage.create_tmp_file, output_id)
 
     async def bg_task(
         tmp_file_id: str = tmp_file_id,
     ):
-        async with video_semaphore:
-            async with heavy_tasks_semaphore:
-                logger.info("Starting captioned video generation for video_id: {}", output_id)
-                try:
-                    tmp_file_ids = [tmp_file_id]
-        
-                    # Setup temp folder path for intermediate files
-                    import uuid
-                    temp_folder_path = os.path.join(storage.storage_path, "folders", "temp")
-                    os.makedirs(temp_folder_path, exist_ok=True)
-
+        async with heavy_tasks_semaphore:
+            logger.debug("Starting captioned video generation for video_id: {}", output_id)
+            # Etapas pesadas rodam nos pools dedicados para não bloquear o event loop
+            tmp_file_ids = [tmp_file_id]
+            work_dir = await asyncio.to_thread(tempfile.mkdtemp, prefix="captioned-", dir=SCRATCH_DIR)
+            try:
+                # Fala (TTS/STT) ocupa uma vaga de TTS; a vaga de vídeo só é
+                # reservada para a codificação no ffmpeg
+                async with tts_semaphore:
                     # set audio, generate captions
                     captions = None
-                    tts_audio_id = audio_id
-                    if tts_audio_id:
-                        audio_path = storage.get_media_path(tts_audio_id)
-                        stt = STT(model_size="medium")  # Modelo melhor para maior qualidade
-                        # Detect language based on selected voice
-                        from video.tts import LANGUAGE_VOICE_MAP
-                        lang_info = LANGUAGE_VOICE_MAP.get(kokoro_voice, {})
-                        whisper_language = "pt" if lang_info.get("lang_code") == "p" else "en"
-                        captions = stt.transcribe(audio_path=audio_path, language=whisper_language)[0]
-                        builder.set_audio(audio_path)
+                    if audio_id:
+                        audio_path = input_audio_path
+                        stt = await run_in_pool(tts_executor, get_stt, "medium")  # Modelo melhor para maior qualidade
+                        captions = (await run_in_pool(
+                            tts_executor, stt.transcribe,
+                            audio_path=audio_path, language=whisper_language, beam_size=beam_size,
+                        ))[0]
                     # generate TTS and set audio
                     else:
-                        # Create TTS audio in temp folder (intermediate file)
-                        import uuid
-                        asset_id = str(uuid.uuid4())
-                        filename = f"{asset_id}.wav"
-                        temp_folder_path = os.path.join(storage.storage_path, "folders", "temp")
-                        os.makedirs(temp_folder_path, exist_ok=True)
-                        audio_path = os.path.join(temp_folder_path, filename)
-                        tts_audio_id = asset_id  # Use clean UUID for temp audio file
-                        tmp_file_ids.append(tts_audio_id)
-                        
-                        # Generate TTS audio
-                        tts_captions = ttsManager.kokoro(
-                            text=text or "",
-                            output_path=audio_path,
-                            voice=kokoro_voice or "",
-                            speed=int(kokoro_speed or 1),
-                        )[0]
-                        
-                        # Debug log for TTS captions
-                        logger.debug(f"Captions returned by TTS: {len(tts_captions) if tts_captions else 0} items")
-                        
-                        # For Portuguese, always use Whisper STT as Kokoro doesn't return correct timestamps
-                        from video.tts import LANGUAGE_VOICE_MAP
-                        lang_info = LANGUAGE_VOICE_MAP.get(kokoro_voice, {})
-                        is_portuguese = lang_info.get("lang_code") == "p"
-                        
-                        if is_portuguese or not tts_captions:
-                            logger.debug("Using Whisper STT to generate captions (Portuguese language or TTS without timestamps)")
-                            stt = STT(model_size="medium")  # Modelo melhor para maior qualidade
-                            whisper_language = "pt" if is_portuguese else "en"
-                            captions = stt.transcribe(audio_path=audio_path, language=whisper_language)[0]
-                            logger.debug(f"Captions generated by Whisper STT: {len(captions) if captions else 0} items")
-                        else:
-                            captions = tts_captions
-                            logger.debug("Using TTS captions")
-                            
-                    builder.set_audio(audio_path)
-
-                    # create subtitle
-                    captionsManager = Caption()
-                    # Create subtitle in temp folder (intermediate file)
-                    subtitle_asset_id = str(uuid.uuid4())
-                    subtitle_filename = f"{subtitle_asset_id}.ass"
-                    subtitle_path = os.path.join(temp_folder_path, subtitle_filename)
-                    subtitle_id = subtitle_asset_id  # Use clean UUID for temp subtitle file
-                    tmp_file_ids.append(subtitle_id)
-                    segments = captionsManager.create_subtitle_segments_english(
-                        captions=captions if isinstance(captions, list) else [],
-                        lines=1,  # Uma palavra por vez
-                        max_length=1,  # Uma palavra por legenda
-                    )
-                    logger.debug(f"Subtitle segments created: {len(segments) if segments else 0}")
-                    if segments and len(segments) > 0:
-                        logger.debug(f"Example segment: {segments[0]}")
-                        
-                    captionsManager.create_subtitle(
-                        segments=segments,
-                        font_size=120,
-                        output_path=subtitle_path,
-                        dimensions=dimensions,
-                        shadow_blur=10,
-                        stroke_size=5,
-                    )
-                    logger.debug(f"Subtitle file created at: {subtitle_path}")
-                    builder.set_captions(
-                        file_path=subtitle_path,
-                    )
-
-                    # Set background based on media type
-                    background_path = storage.get_media_path(background_id)
-                    if media_type == "image":
-                        builder.set_background_image(background_path)
-                    elif media_type == "video":
-                        builder.set_background_video(background_path)
-
-                    builder.set_output_path(output_path)
+                        # Create TTS audio in the scratch dir (intermediate file)
+                        audio_path = os.path.join(work_dir, "audio.wav")
+
+                        # For Portuguese, Kokoro doesn't return correct timestamps: align the
+                        # spoken words to the audio, or transcribe with Whisper STT
+                        use_alignment = is_portuguese and USE_FORCED_ALIGNMENT
+                        # Carrega o modelo que com certeza será usado em paralelo com a síntese
+                        stt_future = (
+                            asyncio.create_task(run_in_pool(tts_executor, get_stt, "medium"))
+                            if is_portuguese and not use_alignment else None
+                        )
+                        aligner_future = (
+                            asyncio.create_task(run_in_pool(tts_executor, get_aligner))
+                            if use_alignment else None
+                        )
 
-                    builder.execute()
-                    
-                    # Save metadata for the final video in temp folder
-                    if name:  # If custom name was provided
-                        storage._save_file_metadata(output_id, {
-                            "custom_name": name,
-                            "original_filename": name,
-                            "media_type": "video",
-                            "folder_path": "temp",
-                            "file_extension": ".mp4"
-                        })
-
-                    for tmp_file_id in tmp_file_ids:
-                        if storage.media_exists(tmp_file_id):
-                            storage.delete_media(tmp_file_id)
+                        try:
+                            # Generate TTS audio
+                            tts_captions = (await run_in_pool(
+                                tts_executor,
+                                ttsManager.kokoro,
+                                text=text or "",
+                                output_path=audio_path,
+                                voice=kokoro_voice or "",
+                                speed=kokoro_speed if kokoro_speed is not None else 1.0,
+                            ))[0]
+
+                            # Debug log for TTS captions
+                            logger.debug(f"Captions returned by TTS: {len(tts_captions) if tts_captions else 0} items")
+
+                            if aligner_future is not None:
+                                try:
+                                    aligner = await aligner_future
+                                    # O Kokoro não devolve tokens fora do G2P em inglês: alinha
+                                    # as palavras do mesmo texto pré-processado que foi falado
+                                    spoken_words = ttsManager.preprocess_text(text or "", whisper_language).split()
+                                    captions = (await run_in_pool(
+                                        tts_executor, aligner.align, audio_path, spoken_words
+                                    ))[0]
+                                    logger.debug("Using forced-alignment captions")
+                                except Exception as e:
+                                    logger.warning("Forced alignment failed, falling back to Whisper STT: {}", e)
+
+                            if captions is None and (is_portuguese or not tts_captions):
+                                logger.debug("Using Whisper STT to generate captions (Portuguese language or TTS without timestamps)")
+                                if stt_future is not None:
+                                    stt = await stt_future
+                                else:
+                                    stt = await run_in_pool(tts_executor, get_stt, "medium")  # Modelo melhor para maior qualidade
+                                captions = (await run_in_pool(
+                                    tts_executor, stt.transcribe,
+                                    audio_path=audio_path, language=whisper_language, beam_size=beam_size,
+                                ))[0]
+                                logger.debug(f"Captions generated by Whisper STT: {len(captions) if captions else 0} items")
+                            elif captions is None:
+                                captions = tts_captions
+                                logger.debug("Using TTS captions")
+                        finally:
+                            # Nenhuma task de carga de modelo fica órfã se o Kokoro falhar
+                            # ou se o modelo não chegar a ser usado
+                            discard_task(stt_future)
+                            discard_task(aligner_future)
+                        
+                builder.set_audio(audio_path)
+
+                # create subtitle
+                # Create subtitle in the scratch dir (intermediate file)
+                subtitle_path = os.path.join(work_dir, "subtitles.ass")
+                segments = captions_manager.create_subtitle_segments_english(
+                    captions=captions if isinstance(captions, list) else [],
+                    lines=1,  # Uma linha por legenda
+                    max_length=SUBTITLE_CAPTION_MAX_CHARS,  # Padrão: uma palavra por legenda
+                )
+                logger.debug(f"Subtitle segments created: {len(segments) if segments else 0}")
+                if segments and len(segments) > 0:
+                    logger.debug(f"Example segment: {segments[0]}")
                     
-                    logger.info("Completed captioned video generation for video_id: {}", output_id)
-                except Exception as e:
-                    logger.error("Error in captioned video generation: {}", e)
-                    # Cleanup temporary files in case of error
-                    if 'tmp_file_ids' in locals():
-                        for tmp_file_id in tmp_file_ids:
-                            if storage.media_exists(tmp_file_id):
-                                storage.delete_media(tmp_file_id)
-
-    background_tasks.add_task(bg_task, tmp_file_id=tmp_file_id)
+                await asyncio.to_thread(
+                    captions_manager.create_subtitle,
+                    segments=segments,
+                    font_size=120,
+                    output_path=subtitle_path,
+                    dimensions=dimensions,
+                    shadow_blur=10,
+                    stroke_size=5,
+                )
+                logger.debug(f"Subtitle file created at: {subtitle_path}")
+                builder.set_captions(
+                    file_path=subtitle_path,
+                )
+
+                # Set background based on media type
+                if media_type == "image":
+                    builder.set_background_image(background_path)
+                elif media_type == "video":
+                    builder.set_background_video(background_path)
+
+                builder.set_output_path(output_path)
+
+                async with video_semaphore:
+                    await run_in_pool(video_executor, builder.execute)
+                
+                # Save metadata for the final video in temp folder
+                if name:  # If custom name was provided
+                    await asyncio.to_thread(storage._save_file_metadata, output_id, {
+                        "custom_name": name,
+                        "original_filename": name,
+                        "media_type": "video",
+                        "folder_path": "temp",
+                        "file_extension": ".mp4"
+                    })
+
+                await asyncio.to_thread(storage.delete_media_batch, tmp_file_ids)
+                
+                logger.debug("Completed captioned video generation for video_id: {}", output_id)
+            except Exception as e:
+                logger.error("Error in captioned video generation: {}", e)
+                # Cleanup temporary files in case of error
+                await asyncio.to_thread(storage.delete_media_batch, tmp_file_ids)
+            finally:
+                await asyncio.to_thread(shutil.rmtree, work_dir, ignore_errors=True)
+
+    if not _enqueue_job(bg_task):
+        await asyncio.to_thread(storage.delete_media_batch, [tmp_file_id])
+        return ORJSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"error": "Server busy processing other heavy tasks. Please try again later."},
+        )
 
     return {
         "file_id": output_id,
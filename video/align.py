@@ -0,0 +1,83 @@
+import re
+import unicodedata
+from typing import Dict, List
+
+import torch
+import torchaudio
+from loguru import logger
+from video.config import device
+
+
+class Aligner:
+    def __init__(self):
+        """
+        Inicializa o modelo de alinhamento forçado (MMS_FA, CTC) do torchaudio
+
+        Alinhar um texto já conhecido ao áudio é um único forward pass,
+        bem mais barato que transcrever o mesmo áudio com o Whisper.
+        """
+        bundle = torchaudio.pipelines.MMS_FA
+        self.sample_rate = bundle.sample_rate
+        # O wav2vec2 não tem todas as operações em MPS; fora de CUDA usa a CPU
+        self.device = torch.device("cuda") if device.type == "cuda" else torch.device("cpu")
+
+        logger.info(f"Inicializando modelo de alinhamento MMS_FA em {self.device.type}")
+        self.model = bundle.get_model(with_star=False).to(self.device)
+        self.tokenizer = bundle.get_tokenizer()
+        self.aligner = bundle.get_aligner()
+
+    @staticmethod
+    def normalize_word(word: str) -> str:
+        """
+        Reduz a palavra ao alfabeto do MMS_FA (letras sem acento e apóstrofo)
+        """
+        word = unicodedata.normalize("NFKD", word.lower())
+        return re.sub(r"[^a-z']", "", word)
+
+    def align(self, audio_path: str, words: List[str]) -> tuple[List[Dict], float]:
+        """
+        Gera timestamps por palavra para um texto conhecido
+
+        Args:
+            audio_path: Caminho para o arquivo de áudio
+            words: Palavras faladas no áudio, em ordem
+
+        Returns:
+            (captions, duration) no mesmo formato de STT.transcribe
+
+        Raises:
+            ValueError: quando alguma palavra falada não pode ser alinhada
+                        (ex.: números), para o chamador usar o Whisper
+        """
+        captions = []
+        tokens = []
+        for word in words:
+            normalized = self.normalize_word(word)
+            if normalized:
+                captions.append({"text": word.strip(), "start_ts": 0.0, "end_ts": 0.0})
+                tokens.append(normalized)
+            elif any(ch.isalnum() for ch in word):
+                raise ValueError(f"Palavra sem representação para alinhamento: {word!r}")
+            elif captions:
+                # Pontuação fica junto da palavra anterior
+                captions[-1]["text"] += word.strip()
+        if not tokens:
+            raise ValueError("Nenhuma palavra para alinhar")
+
+        waveform, sample_rate = torchaudio.load(audio_path)
+        waveform = waveform.mean(dim=0, keepdim=True)
+        if sample_rate != self.sample_rate:
+            waveform = torchaudio.functional.resample(waveform, sample_rate, self.sample_rate)
+        duration = waveform.size(1) / self.sample_rate
+
+        with torch.inference_mode():
+            emission, _ = self.model(waveform.to(self.device))
+            token_spans = self.aligner(emission[0], self.tokenizer(tokens))
+
+        seconds_per_frame = duration / emission.size(1)
+        for caption, spans in zip(captions, token_spans):
+            caption["start_ts"] = spans[0].start * seconds_per_frame
+            caption["end_ts"] = spans[-1].end * seconds_per_frame
+
+        logger.info(f"Alinhamento concluído: {len(captions)} palavras em {duration:.2f}s de áudio")
+        return captions, duration
@@ -23,6 +23,7 @@ class VideoBuilder:
 
         # Internal state
         self.media_utils = None
+        self.audio_duration = None  # medido pelo ffprobe em build_command
 
     def set_media_utils(self, media_utils: MediaUtils):
         """Set the media manager for duration calculations."""
@@ -104,6 +105,7 @@ class VideoBuilder:
             audio_duration = media_info.get("duration")
             if not audio_duration:
                 raise ValueError("Could not determine audio duration")
+        self.audio_duration = audio_duration
 
         # Build command
         cmd = [self.ffmpeg_path, "-y"]
@@ -223,8 +225,8 @@ class VideoBuilder:
             # Calculate expected duration for progress tracking
             expected_duration = None
             if self.audio_file:
-                audio_info = self.media_utils.get_audio_info(self.audio_file)
-                expected_duration = audio_info.get("duration")
+                # Reaproveita a duração medida em build_command (sem segundo ffprobe)
+                expected_duration = self.audio_duration
             elif self.background and self.background.get("type") == "video":
                 video_info = self.media_utils.get_video_info(self.background["file"])
                 expected_duration = video_info.get("duration")
@@ -125,6 +125,17 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         pos_x = int(width / 2)
         pos_y = int(height * position_from_top)
 
+        # Tags fixas calculadas uma vez; as linhas são juntadas no final
+        main_override_tags = f"\\pos({pos_x},{pos_y})"
+        shadow_override_tags = None
+        if shadow_blur > 0:
+            shadow_color_opaque = shadow_color.replace("&H80", "&H00")
+            shadow_override_tags = (
+                f"{main_override_tags}\\1c{shadow_color_opaque}\\3c&H00000000\\4c&H00000000"
+                f"\\blur{shadow_blur}"
+            )
+        events = [ass_content]
+
         # Process each segment and add to the subtitle file
         for segment in segments:
             start_time = self.format_time(segment["start_ts"])
@@ -139,27 +150,20 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
                         formatted_text += "\\N"
                     formatted_text += line
 
-            if shadow_blur > 0:
-                shadow_color_opaque = shadow_color.replace("&H80", "&H00")
-                shadow_override_tags = f"\\pos({pos_x},{pos_y})\\1c{shadow_color_opaque}\\3c&H00000000\\4c&H00000000"
-                
-                if shadow_blur > 0:
-                    shadow_override_tags += f"\\blur{shadow_blur}"
-                
+            if shadow_override_tags:
                 shadow_formatted_text = f"{{{shadow_override_tags}}}" + formatted_text
                 
                 # Add shadow dialogue line first (so it appears behind)
-                ass_content += f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{shadow_formatted_text}\n"
+                events.append(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{shadow_formatted_text}\n")
 
             # Create main text layer
-            main_override_tags = f"\\pos({pos_x},{pos_y})"
             main_formatted_text = f"{{{main_override_tags}}}" + formatted_text
 
             # Add main dialogue line (appears on top)
-            ass_content += f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{main_formatted_text}\n"
+            events.append(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{main_formatted_text}\n")
 
         with open(output_path, "w", encoding="utf-8") as f:
-            f.write(ass_content)
+            f.write("".join(events))
 
         logger.debug("subtitle (ass) was created with drop shadow")
 
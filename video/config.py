@@ -1,5 +1,4 @@
 import os
-import torch
 from loguru import logger
 
 # Configurações de otimização de CPU
@@ -9,47 +8,67 @@ CPU_USAGE_LIMIT = float(os.environ.get("CPU_USAGE_LIMIT", "0.9"))  # 90% do CPU
 # Chave da API do ElevenLabs
 ELEVENLABS_API_KEY = os.environ.get("ELEVENLABS_API_KEY")
 
+
+def available_cpu_cores() -> int:
+    """
+    Número de cores que o processo pode usar de fato
+
+    Considera a afinidade de CPU (ex.: docker --cpuset-cpus) e a cota de CPU
+    do cgroup, tanto v2 (cpu.max) quanto v1 (cpu.cfs_quota_us/cpu.cfs_period_us).
+    """
+    num_cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    quota = period = None
+    if os.path.exists("/sys/fs/cgroup/cpu.max"):
+        with open("/sys/fs/cgroup/cpu.max", "r") as f:
+            values = f.readline().split()
+        if len(values) == 2:
+            if values[0] != "max":
+                quota, period = int(values[0]), int(values[1])
+        else:
+            logger.warning("File /sys/fs/cgroup/cpu.max does not have 2 values, ignoring it")
+    elif os.path.exists("/sys/fs/cgroup/cpu/cpu.cfs_quota_us"):
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "r") as f:
+            quota = int(f.read().strip())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us", "r") as f:
+            period = int(f.read().strip())
+        if quota <= 0:  # -1 = sem limite
+            quota = None
+
+    if quota and period:
+        quota_cores = max(1, quota // period)
+        num_cores = min(num_cores or quota_cores, quota_cores)
+        logger.info("cgroup CPU quota: {} cores", num_cores)
+    return num_cores or 1
+
+
+# OTIMIZAÇÃO: limitar threads baseado no ambiente. OpenMP/MKL leem essas
+# variáveis quando a biblioteca é carregada, então elas precisam ser definidas
+# antes do primeiro "import torch" (por isso server.py importa este módulo primeiro).
+# Valores definidos explicitamente no deploy têm prioridade
+cpu_cores = available_cpu_cores()
+cpu_threads = max(1, min(MAX_CPU_THREADS, int(cpu_cores * CPU_USAGE_LIMIT)))
+for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS"):
+    os.environ.setdefault(var, str(cpu_threads))
+
+import torch  # noqa: E402
+
 device = "cpu"
+num_threads = 0  # 0 = padrão das bibliotecas (ajustado abaixo quando roda em CPU)
 if torch.cuda.is_available():
     device = torch.device("cuda")
 elif torch.backends.mps.is_available():
     device = torch.device("mps")
 else:
     device = torch.device("cpu")
-    num_cores = os.cpu_count()
-    if os.path.exists("/sys/fs/cgroup/cpu.max"):
-        with open("/sys/fs/cgroup/cpu.max", "r") as f:
-            line = f.readline()
-            if len(line.split()) == 2:
-                if line.split()[0] == "max":
-                    logger.info(
-                        "File /sys/fs/cgroup/cpu.max has max value, using os.cpu_count()"
-                    )
-                else:
-                    cpu_max = int(line.split()[0])
-                    cpu_period = int(line.split()[1])
-                    num_cores = cpu_max // cpu_period
-                    logger.info("Using {} cores", num_cores)
-            else:
-                logger.warning(
-                    "File /sys/fs/cgroup/cpu.max does not have 2 values, using os.cpu_count()"
-                )
-    else:
-        logger.info("File /sys/fs/cgroup/cpu.max not found, using os.cpu_count()")
-
-    # OTIMIZAÇÃO: Limitar threads baseado no ambiente
-    num_threads = min(MAX_CPU_THREADS, int((num_cores or 1) * CPU_USAGE_LIMIT))
-    num_threads = max(1, num_threads)  # Pelo menos 1 thread
-    
+    num_threads = cpu_threads
+
     logger.info("Optimized CPU configuration: {} cores available, using {} threads (limit: {})", 
-                num_cores, num_threads, MAX_CPU_THREADS)
+                cpu_cores, num_threads, MAX_CPU_THREADS)
     
     torch.set_num_threads(num_threads)
     
     # Configurações adicionais para otimização
     torch.set_num_interop_threads(1)  # Reduz overhead de paralelização
-    os.environ["OMP_NUM_THREADS"] = str(num_threads)
-    os.environ["MKL_NUM_THREADS"] = str(num_threads)
 
 map_location = torch.device(device)
 
@@ -341,8 +341,11 @@ class MediaUtils:
                 f"executing ffmpeg command for {operation_name}"
             )
 
+            # stdin fechado: o ffmpeg não fica lendo o terminal do servidor
+            # (tecla 'q') nem disputa o stdin entre jobs concorrentes
             process = subprocess.Popen(
                 cmd,
+                stdin=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
                 universal_newlines=True,
                 text=True,
@@ -479,6 +482,7 @@ class MediaUtils:
 
             process = subprocess.Popen(
                 cmd,
+                stdin=subprocess.DEVNULL,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
@@ -16,17 +16,24 @@ import os
 WHISPER_MODEL_SIZE = os.environ.get("WHISPER_MODEL_SIZE", "base")
 
 # Parâmetros de qualidade do Whisper
-WHISPER_BEAM_SIZE = int(os.environ.get("WHISPER_BEAM_SIZE", "10"))  # Maior = melhor qualidade
+WHISPER_BEAM_SIZE = int(os.environ.get("WHISPER_BEAM_SIZE", "5"))  # Maior = melhor qualidade, custo linear
 WHISPER_TEMPERATURE = float(os.environ.get("WHISPER_TEMPERATURE", "0.0"))  # 0.0 = determinístico
 WHISPER_NO_SPEECH_THRESHOLD = float(os.environ.get("WHISPER_NO_SPEECH_THRESHOLD", "0.6"))
 WHISPER_LOG_PROB_THRESHOLD = float(os.environ.get("WHISPER_LOG_PROB_THRESHOLD", "-1.0"))
 WHISPER_COMPRESSION_RATIO_THRESHOLD = float(os.environ.get("WHISPER_COMPRESSION_RATIO_THRESHOLD", "2.4"))
+# Trechos de áudio decodificados por lote (1 = transcrição sequencial)
+WHISPER_BATCH_SIZE = int(os.environ.get("WHISPER_BATCH_SIZE", "8"))
+# Transcrições simultâneas no mesmo modelo (1 = jobs concorrentes esperam a vez)
+WHISPER_NUM_WORKERS = int(os.environ.get("WHISPER_NUM_WORKERS", "1"))
 
 # ====== CONFIGURAÇÕES DE PROCESSAMENTO DE TEXTO ======
 
 # Configurações para segmentação de legendas
 SUBTITLE_MAX_CHARS_PER_LINE = int(os.environ.get("SUBTITLE_MAX_CHARS_PER_LINE", "45"))
 SUBTITLE_MAX_LINES = int(os.environ.get("SUBTITLE_MAX_LINES", "2"))
+# Vídeo legendado: caracteres por legenda (1 = uma palavra por vez; valores como
+# 10-12 juntam palavras curtas no mesmo evento e reduzem o trabalho do libass)
+SUBTITLE_CAPTION_MAX_CHARS = int(os.environ.get("SUBTITLE_CAPTION_MAX_CHARS", "1"))
 
 # Configurações visuais das legendas
 SUBTITLE_FONT_SIZE = int(os.environ.get("SUBTITLE_FONT_SIZE", "120"))
@@ -93,14 +100,14 @@ def get_quality_preset(preset: str = "balanced"):
     presets = {
         "fast": {
             "whisper_model": "tiny",
-            "whisper_beam_size": 5,
+            "whisper_beam_size": 1,  # Busca gulosa
             "subtitle_max_chars": 60,
             "subtitle_lines": 1,
             "tts_chunk_length": 500,
         },
         "balanced": {
             "whisper_model": "base",
-            "whisper_beam_size": 10,
+            "whisper_beam_size": 5,
             "subtitle_max_chars": 45,
             "subtitle_lines": 2,
             "tts_chunk_length": 300,
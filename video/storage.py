@@ -1,8 +1,34 @@
 from typing import Tuple, Optional
+from urllib.parse import urlparse
 import uuid
 import os
+import re
+import json
+import unicodedata
+import shutil
+import threading
 import requests
 import datetime
+from loguru import logger
+
+# Buffer usado para copiar streams de upload direto para o disco
+STREAM_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def copy_stream(src, dst, length: int = STREAM_CHUNK_SIZE) -> None:
+    """
+    Copies src into dst in chunks.
+    When src supports readinto, a single buffer is reused for the whole copy
+    instead of allocating a new bytes object per chunk.
+    """
+    readinto = getattr(src, "readinto", None)
+    if readinto is None:
+        shutil.copyfileobj(src, dst, length=length)
+        return
+    buf = bytearray(length)
+    with memoryview(buf) as view:
+        while n := readinto(buf):
+            dst.write(view[:n])
 
 
 class MediaType:
@@ -28,6 +54,11 @@ class Storage:
         # Create default folders
         self._create_default_folders()
 
+        # Índice em memória media_id -> (path, info) para evitar varrer a árvore
+        # inteira (os.walk) a cada lookup; entradas são revalidadas com um stat
+        self._path_index: dict = {}
+        self._index_lock = threading.Lock()
+
     def _validate_media_id(self, media_id: str) -> tuple[str, str]:
         """
         Validates and parses a media ID to prevent path traversal attacks.
@@ -210,8 +241,26 @@ class Storage:
         media_id = f"{media_type}_{filename}"
         return media_id
 
+    def _store_file(self, file_path: str, file_stream=None, source_path: Optional[str] = None) -> None:
+        """
+        Writes an upload to its final path, either by streaming file_stream
+        or by moving an already downloaded file (rename, no copy on the same filesystem).
+        """
+        if source_path is not None:
+            try:
+                os.replace(source_path, file_path)
+            except OSError:
+                # Different filesystem: fall back to copy + delete
+                shutil.move(source_path, file_path)
+            return
+
+        # Stream the file to disk without loading entirely into memory
+        with open(file_path, "wb") as f:
+            copy_stream(file_stream, f)
+
     def upload_media_stream(
-        self, media_type: str, file_stream, file_extension: str = "", custom_name: str = ""
+        self, media_type: str, file_stream, file_extension: str = "", custom_name: str = "",
+        source_path: Optional[str] = None
     ) -> str:
         """
         Uploads media to the server using streaming to avoid memory overload.
@@ -221,6 +270,7 @@ class Storage:
             file_stream: File stream object with read() method.
             file_extension (str): File extension, e.g., '.jpg', '.mp4', '.wav'.
             custom_name (str): Custom name for the file (optional).
+            source_path (str): Existing file to move into place instead of reading file_stream (optional).
 
         Returns:
             str: Media ID, e.g., 'image_12345.jpg' or 'video_67890.mp4'.
@@ -259,20 +309,14 @@ class Storage:
         if not resolved_path.startswith(storage_abs_path):
             raise ValueError("Path traversal attempt detected")
 
-        # Stream the file to disk without loading entirely into memory
-        with open(file_path, "wb") as f:
-            while True:
-                chunk = file_stream.read(8192)  # Read in 8KB chunks
-                if not chunk:
-                    break
-                f.write(chunk)
+        self._store_file(file_path, file_stream, source_path)
 
         media_id = f"{media_type}_{filename}"
         return media_id
 
     def upload_media_stream_to_folder(
         self, media_type: str, file_stream, file_extension: str = "", 
-        folder_path: str = "", custom_name: str = ""
+        folder_path: str = "", custom_name: str = "", source_path: Optional[str] = None
     ) -> str:
         """
         Upload media to a specific folder using streaming to avoid memory overload.
@@ -283,6 +327,7 @@ class Storage:
             file_extension (str): File extension
             folder_path (str): Target folder path (real name or normalized ID)
             custom_name (str): Custom name for the file
+            source_path (str): Existing file to move into place instead of reading file_stream (optional)
             
         Returns:
             str: Media ID of the created file
@@ -342,13 +387,7 @@ class Storage:
         if not resolved_path.startswith(storage_abs_path):
             raise ValueError("Path traversal attempt detected")
         
-        # Stream the file to disk without loading entirely into memory
-        with open(file_path, "wb") as f:
-            while True:
-                chunk = file_stream.read(8192)  # Read in 8KB chunks
-                if not chunk:
-                    break
-                f.write(chunk)
+        self._store_file(file_path, file_stream, source_path)
         
         # Save file metadata (including custom name)
         if custom_name:
@@ -391,11 +430,37 @@ class Storage:
 
         if os.path.exists(file_path):
             os.remove(file_path)
+            with self._index_lock:
+                self._path_index.pop(media_id, None)
             # Delete metadata too
             self._delete_file_metadata(media_id)
         else:
             raise FileNotFoundError(f"Media file {media_id} not found.")
 
+    def delete_media_batch(self, media_ids: list) -> int:
+        """
+        Deletes several media files, ignoring the ones that no longer exist.
+        Skips the exists-check of delete_media (one unlink per ID, and no
+        race between the check and the delete).
+
+        Args:
+            media_ids (list): Media IDs to delete.
+
+        Returns:
+            int: Number of files actually deleted.
+        """
+        deleted = 0
+        for media_id in media_ids:
+            try:
+                os.remove(self._get_safe_file_path(media_id))
+            except (ValueError, FileNotFoundError):
+                continue
+            with self._index_lock:
+                self._path_index.pop(media_id, None)
+            self._delete_file_metadata(media_id)
+            deleted += 1
+        return deleted
+
     def media_exists(self, media_id: str) -> bool:
         """
         Checks if media exists by ID.
@@ -425,6 +490,23 @@ class Storage:
         """
         return self._get_safe_file_path(media_id)
 
+    def resolve_path(self, media_id: str) -> Optional[str]:
+        """
+        Resolves a media ID to its file path with a single lookup
+        (instead of media_exists + get_media_path).
+
+        Args:
+            media_id (str): Media ID to resolve.
+
+        Returns:
+            Optional[str]: File path, or None if the media does not exist
+        """
+        try:
+            file_path = self._get_safe_file_path(media_id)
+        except (ValueError, FileNotFoundError):
+            return None
+        return file_path if os.path.exists(file_path) else None
+
     ### untested
     def create_media_filename(
         self, media_type: str, file_extension: str = ""
@@ -553,8 +635,6 @@ class Storage:
         Returns:
             bool: True if the URL is valid, False otherwise.
         """
-        from urllib.parse import urlparse
-
         try:
             result = urlparse(url)
             return all([result.scheme, result.netloc])
@@ -577,12 +657,38 @@ class Storage:
         if not self.is_valid_url(url):
             raise ValueError("Invalid URL")
 
-        response = requests.get(url)
-        if response.status_code != 200:
-            raise ValueError(f"Failed to download media from {url}")
-
         file_extension = os.path.splitext(url)[1]
-        return self.upload_media(media_type, response.content, file_extension)
+        with requests.get(url, stream=True, timeout=60) as response:
+            if response.status_code != 200:
+                raise ValueError(f"Failed to download media from {url}")
+            response.raw.decode_content = True
+            return self.upload_media_stream(media_type, response.raw, file_extension)
+    
+    def upload_media_from_path(
+        self, media_type: str, source_path: str, file_extension: str = "",
+        folder_path: str = "", custom_name: str = ""
+    ) -> str:
+        """
+        Moves an already downloaded file into storage (rename, no copy).
+
+        Args:
+            media_type (str): Type of media
+            source_path (str): Path of the file to move; it no longer exists afterwards
+            file_extension (str): File extension
+            folder_path (str): Target folder path (optional)
+            custom_name (str): Custom name for the file (optional)
+
+        Returns:
+            str: Media ID of the created file
+        """
+        if folder_path:
+            return self.upload_media_stream_to_folder(
+                media_type, None, file_extension, folder_path, custom_name,
+                source_path=source_path,
+            )
+        return self.upload_media_stream(
+            media_type, None, file_extension, custom_name, source_path=source_path
+        )
     
     def upload_media_to_folder(self, media_type: str, media_data: bytes, 
                               file_extension: str = "", folder_path: str = "", custom_name: str = "") -> str:
@@ -721,7 +827,7 @@ class Storage:
                         })
                     except Exception as e:
                         # Log error but continue listing other files
-                        print(f"Error processing file {filename}: {e}")
+                        logger.warning("Error processing file {}: {}", filename, e)
                         
         # Sort by creation date (newest first)
         files.sort(key=lambda x: x["created_at"], reverse=True)
@@ -877,7 +983,7 @@ class Storage:
                         stats["total_size_bytes"] += stat.st_size
                         
                     except Exception as e:
-                        print(f"Error processing file {item}: {e}")
+                        logger.warning("Error processing file {}: {}", item, e)
                         
                 elif os.path.isdir(item_path):
                     # It's a folder - recursion to count subfolders
@@ -885,7 +991,7 @@ class Storage:
                     self._count_files_in_all_folders(base_path, new_path, stats)
                     
         except Exception as e:
-            print(f"Error processing folder {current_path}: {e}")
+            logger.warning("Error processing folder {}: {}", current_path, e)
     
     def _create_default_folders(self):
         """
@@ -899,13 +1005,12 @@ class Storage:
         for folder_name in default_folders:
             try:
                 self.create_folder(folder_name)
-                print(f"✅ Folder '{folder_name}' created successfully")
+                logger.debug("Default folder '{}' created", folder_name)
             except Exception as e:
-                print(f"⚠️  Error creating folder '{folder_name}': {e}")
+                logger.debug("Default folder '{}' not created via create_folder: {}", folder_name, e)
                 # Try to create directly if create_folder fails
                 folder_path = os.path.join(folders_path, folder_name)
                 os.makedirs(folder_path, exist_ok=True)
-                print(f"✅ Folder '{folder_name}' created directly")
     
     def create_folder(self, folder_name: str, parent_folder: str = "") -> bool:
         """
@@ -956,13 +1061,15 @@ class Storage:
         if not os.path.exists(base_path):
             return folders
         
-        for item in os.listdir(base_path):
-            item_path = os.path.join(base_path, item)
-            if os.path.isdir(item_path):
+        with os.scandir(base_path) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                item = entry.name
                 try:
-                    stat = os.stat(item_path)
+                    stat = entry.stat()
                     # Count files in folder
-                    file_count = self._count_files_in_folder(os.path.join(parent_folder, item) if parent_folder else item)
+                    file_count = self._count_files_at(entry.path)
                     
                     folders.append({
                         "id": self._normalize_folder_name(item),  # Normalized ID
@@ -973,7 +1080,7 @@ class Storage:
                         "file_count": file_count
                     })
                 except Exception as e:
-                    print(f"Error processing folder {item}: {e}")
+                    logger.warning("Error processing folder {}: {}", item, e)
         
         # Sort by name
         folders.sort(key=lambda x: x["name"])
@@ -1019,8 +1126,11 @@ class Storage:
         if not os.path.exists(full_path):
             return False
         
-        import shutil
         shutil.rmtree(full_path)
+        with self._index_lock:
+            prefix = os.path.join(full_path, "")
+            for media_id in [k for k, (p, _) in self._path_index.items() if p.startswith(prefix)]:
+                del self._path_index[media_id]
         return True
     
     def _count_files_in_folder(self, folder_path: str) -> int:
@@ -1056,6 +1166,18 @@ class Storage:
         if not os.path.exists(full_path):
             return 0
         
+        return self._count_files_at(full_path)
+
+    def _count_files_at(self, full_path: str) -> int:
+        """
+        Recursively counts files under an already resolved directory path.
+        
+        Args:
+            full_path (str): Absolute directory path
+            
+        Returns:
+            int: Number of files in the directory tree
+        """
         count = 0
         for root, dirs, files in os.walk(full_path):
             count += len(files)
@@ -1096,8 +1218,6 @@ class Storage:
         Returns:
             str: Sanitized and safe name
         """
-        import re
-        
         # Remove dangerous characters and keep only letters, numbers, hyphens, underscores and spaces
         sanitized = re.sub(r'[<>:"/\\|?*]', '', filename)
         
@@ -1125,8 +1245,6 @@ class Storage:
             media_id (str): File ID
             metadata (dict): Metadata to save
         """
-        import json
-        
         metadata_dir = os.path.join(self.storage_path, "metadata")
         os.makedirs(metadata_dir, exist_ok=True)
         
@@ -1134,6 +1252,9 @@ class Storage:
         
         with open(metadata_file, "w", encoding="utf-8") as f:
             json.dump(metadata, f, ensure_ascii=False, indent=2)
+        # O índice guarda o custom_name lido no scan; força uma nova leitura
+        with self._index_lock:
+            self._path_index.pop(media_id, None)
     
     def _get_file_metadata(self, media_id: str) -> dict:
         """
@@ -1145,8 +1266,6 @@ class Storage:
         Returns:
             dict: File metadata or empty dict if doesn't exist
         """
-        import json
-        
         metadata_dir = os.path.join(self.storage_path, "metadata")
         metadata_file = os.path.join(metadata_dir, f"{media_id}.json")
         
@@ -1186,9 +1305,6 @@ class Storage:
         Returns:
             str: Normalized folder ID
         """
-        import re
-        import unicodedata
-        
         # Remove accents and special characters
         normalized = unicodedata.normalize('NFD', folder_name)
         normalized = ''.join(char for char in normalized if unicodedata.category(char) != 'Mn')
@@ -1254,50 +1370,51 @@ class Storage:
         if not os.path.exists(full_path):
             return result
         
-        # List subfolders
-        for item in os.listdir(full_path):
-            item_path = os.path.join(full_path, item)
-            if os.path.isdir(item_path):
-                stat = os.stat(item_path)
-                result["folders"].append({
-                    "id": self._normalize_folder_name(item),  # Normalized ID
-                    "name": item,
-                    "path": os.path.join(folder_path, item) if folder_path else item,
-                    "created_at": stat.st_ctime,
-                    "file_count": self._count_files_in_folder(os.path.join(folder_path, item) if folder_path else item)
-                })
-            elif os.path.isfile(item_path):
-                # List files  
-                stat = os.stat(item_path)
-                
-                # Detect media_type based on extension
-                file_ext = os.path.splitext(item)[1].lower()
-                media_type = self._detect_media_type_from_extension(file_ext)
-                
-                # For files, try to find by UUID name  
-                # Extract UUID from filename (format: uuid.ext)
-                file_uuid = os.path.splitext(item)[0]
-                media_id = file_uuid  # Media ID is always the clean UUID
-                
-                # Search metadata to get custom name
-                metadata = self._get_file_metadata(media_id)
-                custom_name = metadata.get("custom_name", "")
-                
-                # Display name: custom name or UUID if none
-                display_name = f"{custom_name}{file_ext}" if custom_name else item
-                
-                result["files"].append({
-                    "media_id": media_id,
-                    "media_type": media_type,
-                    "name": display_name,  # Custom name for display
-                    "filename": display_name,  # Consistency
-                    "path": os.path.join(folder_path, item) if folder_path else item,
-                    "size_bytes": stat.st_size,
-                    "size_mb": round(stat.st_size / (1024 * 1024), 2),
-                    "created_at": stat.st_ctime,
-                    "modified_at": stat.st_mtime,
-                    "file_extension": file_ext
-                })
+        # List subfolders and files in a single scan
+        with os.scandir(full_path) as entries:
+            for entry in entries:
+                item = entry.name
+                if entry.is_dir():
+                    stat = entry.stat()
+                    result["folders"].append({
+                        "id": self._normalize_folder_name(item),  # Normalized ID
+                        "name": item,
+                        "path": os.path.join(folder_path, item) if folder_path else item,
+                        "created_at": stat.st_ctime,
+                        "file_count": self._count_files_at(entry.path)
+                    })
+                elif entry.is_file():
+                    # List files  
+                    stat = entry.stat()
+                    
+                    # Detect media_type based on extension
+                    file_ext = os.path.splitext(item)[1].lower()
+                    media_type = self._detect_media_type_from_extension(file_ext)
+                    
+                    # For files, try to find by UUID name  
+                    # Extract UUID from filename (format: uuid.ext)
+                    file_uuid = os.path.splitext(item)[0]
+                    media_id = file_uuid  # Media ID is always the clean UUID
+                    
+                    # Search metadata to get custom name
+                    metadata = self._get_file_metadata(media_id)
+                    custom_name = metadata.get("custom_name", "")
+                    
+                    # Display name: custom name or UUID if none
+                    display_name = f"{custom_name}{file_ext}" if custom_name else item
+                    
+                    result["files"].append({
+                        "media_id": media_id,
+                        "media_type": media_type,
+                        "name": display_name,  # Custom name for display
+                        "filename": display_name,  # Consistency
+                        "path": os.path.join(folder_path, item) if folder_path else item,
+                        "size_bytes": stat.st_size,
+                        "size_mb": round(stat.st_size / (1024 * 1024), 2),
+                        "created_at": stat.st_ctime,
+                        "modified_at": stat.st_mtime,
+                        "file_extension": file_ext
+                    })
         
         # Sort
         result["folders"].sort(key=lambda x: x["name"])
@@ -1332,9 +1449,11 @@ class Storage:
             
         try:
             # List folders directly from filesystem to avoid circular dependency with list_folders
-            for item in os.listdir(base_path):
-                item_path = os.path.join(base_path, item)
-                if os.path.isdir(item_path):
+            with os.scandir(base_path) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    item = entry.name
                     # Check if this folder's normalized ID matches what we're looking for
                     normalized_id = self._normalize_folder_name(item)
                     if normalized_id == folder_id:
@@ -1352,6 +1471,31 @@ class Storage:
     def _find_file_by_uuid_anywhere(self, media_id: str) -> tuple[str, dict]:
         """
         Finds a file by UUID in any location (folders or default media directories).
+        Results are kept in an in-memory index; a cached path is only reused
+        while the file still exists.
+        
+        Args:
+            media_id (str): Clean UUID or media ID
+            
+        Returns:
+            tuple: (file_path, metadata_dict) where metadata includes folder info
+        """
+        with self._index_lock:
+            cached = self._path_index.get(media_id)
+        if cached is not None:
+            if os.path.exists(cached[0]):
+                return cached[0], dict(cached[1])
+            with self._index_lock:
+                self._path_index.pop(media_id, None)
+
+        file_path, file_info = self._scan_for_uuid(media_id)
+        with self._index_lock:
+            self._path_index[media_id] = (file_path, file_info)
+        return file_path, dict(file_info)
+
+    def _scan_for_uuid(self, media_id: str) -> tuple[str, dict]:
+        """
+        Walks the storage tree looking for a file by UUID (uncached lookup).
         
         Args:
             media_id (str): Clean UUID or media ID
@@ -1,6 +1,7 @@
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, BatchedInferencePipeline
 from loguru import logger
-from video.config import device
+from video.config import device, num_threads
+from video.quality_settings import WHISPER_BATCH_SIZE, WHISPER_NUM_WORKERS, WHISPER_BEAM_SIZE
 import re
 import os
 
@@ -20,13 +21,27 @@ class STT:
         self.model_size = model_size
         self.compute_type = compute_type
         
+        # CTranslate2 só acelera em CUDA; em MPS o modelo roda na CPU
+        ct2_device = "cuda" if device.type == "cuda" else "cpu"
+
         # Ajustar compute_type baseado no dispositivo
-        if device.type == "cpu":
+        if ct2_device == "cpu":
             # Para CPU, usar int8 para melhor performance
             self.compute_type = "int8"
         
         logger.info(f"Inicializando modelo Whisper: {model_size} com compute_type: {self.compute_type}")
-        self.model = WhisperModel(model_size, compute_type=self.compute_type)
+        self.model = WhisperModel(
+            model_size,
+            device=ct2_device,
+            compute_type=self.compute_type,
+            cpu_threads=num_threads,  # mesmo limite de threads do torch
+            num_workers=WHISPER_NUM_WORKERS,
+        )
+        # Pipeline em lote: o VAD divide o áudio em trechos de até 30s que são
+        # decodificados juntos em vez de um após o outro
+        self.batched_model = (
+            BatchedInferencePipeline(model=self.model) if WHISPER_BATCH_SIZE > 1 else None
+        )
 
     def preprocess_text(self, text: str) -> str:
         """
@@ -50,7 +65,7 @@ class STT:
         
         return text
 
-    def transcribe(self, audio_path, beam_size=10, language="pt", temperature=0.0, 
+    def transcribe(self, audio_path, beam_size=WHISPER_BEAM_SIZE, language="pt", temperature=0.0, 
                   condition_on_previous_text=True, compression_ratio_threshold=2.4,
                   log_prob_threshold=-1.0, no_speech_threshold=0.6):
         """
@@ -77,13 +92,11 @@ class STT:
         ).info("Iniciando transcrição com parâmetros otimizados")
         
         try:
-            segments, info = self.model.transcribe(
-                audio_path, 
-                beam_size=beam_size, 
-                word_timestamps=True, 
+            options = dict(
+                beam_size=beam_size,
+                word_timestamps=True,
                 language=language,
                 temperature=temperature,
-                condition_on_previous_text=condition_on_previous_text,
                 compression_ratio_threshold=compression_ratio_threshold,
                 log_prob_threshold=log_prob_threshold,
                 no_speech_threshold=no_speech_threshold,
@@ -91,6 +104,17 @@ class STT:
                 vad_filter=True,  # Filtro de detecção de atividade vocal
                 vad_parameters=dict(min_silence_duration_ms=500)  # Mínimo de silêncio
             )
+            if self.batched_model is not None:
+                # Trechos independentes: sem condicionamento no texto anterior
+                segments, info = self.batched_model.transcribe(
+                    audio_path, batch_size=WHISPER_BATCH_SIZE, **options
+                )
+            else:
+                segments, info = self.model.transcribe(
+                    audio_path,
+                    condition_on_previous_text=condition_on_previous_text,
+                    **options
+                )
 
             duration = info.duration
             captions = []
@@ -1,10 +1,12 @@
 import time
+import threading
 import warnings
 from typing import List, Optional
-from kokoro import KPipeline
+from kokoro import KModel, KPipeline
 import numpy as np
 import soundfile as sf
 from loguru import logger
+import torch
 import torchaudio as ta
 from chatterbox.tts import ChatterboxTTS
 from video.config import device
@@ -14,6 +16,9 @@ import unicodedata
 # Suppress PyTorch warnings
 warnings.filterwarnings("ignore")
 
+# Repositório dos pesos do Kokoro (o mesmo padrão do KPipeline)
+KOKORO_REPO_ID = "hexgrad/Kokoro-82M"
+
 LANGUAGE_CONFIG = {
     "en-us": {
         "lang_code": "a",
@@ -131,6 +136,50 @@ class TTS:
             r'\b(\d{4})-(\d{4})\b': r'\1 a \2',
         }
 
+        # Modelos carregados sob demanda e reaproveitados entre chamadas.
+        # O KModel do Kokoro é compartilhado (o forward não guarda estado), mas
+        # o G2P do KPipeline não é thread-safe: cada thread tem seus pipelines.
+        # O Chatterbox guarda as condicionais no próprio objeto e usa uma trava
+        self._models_lock = threading.Lock()
+        self._kokoro_model = None
+        self._local = threading.local()
+        self._chatterbox = None
+
+    def _get_kokoro_model(self) -> KModel:
+        """
+        Returns the shared Kokoro KModel, loading it on first use
+        """
+        with self._models_lock:
+            if self._kokoro_model is None:
+                logger.info("Carregando modelo Kokoro em {}", device)
+                self._kokoro_model = KModel(repo_id=KOKORO_REPO_ID).to(device).eval()
+            return self._kokoro_model
+
+    def _get_pipeline(self, lang_code: str) -> KPipeline:
+        """
+        Returns this thread's KPipeline for a language code, sharing the KModel
+        """
+        pipelines = getattr(self._local, "pipelines", None)
+        if pipelines is None:
+            pipelines = self._local.pipelines = {}
+        if lang_code not in pipelines:
+            logger.info("Carregando pipeline Kokoro para lang_code={}", lang_code)
+            pipelines[lang_code] = KPipeline(
+                lang_code=lang_code, repo_id=KOKORO_REPO_ID, model=self._get_kokoro_model()
+            )
+        return pipelines[lang_code]
+
+    def _get_chatterbox(self) -> tuple:
+        """
+        Returns the cached (ChatterboxTTS, lock, default conditionals) triple
+        """
+        with self._models_lock:
+            if self._chatterbox is None:
+                logger.info("Carregando modelo Chatterbox")
+                model = ChatterboxTTS.from_pretrained(device=device)
+                self._chatterbox = (model, threading.Lock(), model.conds)
+            return self._chatterbox
+
     def preprocess_text(self, text: str, language: str = "pt") -> str:
         """
         Processa e normaliza o texto para melhor síntese TTS
@@ -242,7 +291,7 @@ class TTS:
         context_logger.info("Iniciando síntese TTS com Kokoro (texto processado)")
         
         try:
-            pipeline = KPipeline(lang_code=lang_code, device=str(device))
+            pipeline = self._get_pipeline(lang_code)
 
             # Dividir texto em chunks se muito longo
             text_chunks = self.split_text_into_chunks(processed_text, max_length=300)
@@ -251,46 +300,48 @@ class TTS:
             all_audio_data = []
             full_audio_length = 0
             
-            for chunk_idx, chunk in enumerate(text_chunks):
-                context_logger.debug(f"Processando chunk {chunk_idx + 1}/{len(text_chunks)}: {chunk[:50]}...")
+            # inference_mode: sem autograd nem contadores de versão nos tensores
+            with torch.inference_mode():
+                for chunk_idx, chunk in enumerate(text_chunks):
+                    context_logger.debug(f"Processando chunk {chunk_idx + 1}/{len(text_chunks)}: {chunk[:50]}...")
                 
-                generator = pipeline(chunk, voice=voice, speed=speed)  # type: ignore
+                    generator = pipeline(chunk, voice=voice, speed=speed)  # type: ignore
 
-                chunk_captions = []
-                chunk_audio_data = []
-                chunk_audio_length = 0
+                    chunk_captions = []
+                    chunk_audio_data = []
+                    chunk_audio_length = 0
                 
-                for _, result in enumerate(generator):
-                    data = result.audio
-                    if data is None:
-                        continue
-                    audio_length = len(data) / 24000
-                    chunk_audio_data.append(data)
+                    for _, result in enumerate(generator):
+                        data = result.audio
+                        if data is None:
+                            continue
+                        audio_length = len(data) / 24000
+                        chunk_audio_data.append(data)
                     
-                    if result.tokens:
-                        tokens = result.tokens
-                        for t in tokens:
-                            if t.start_ts is None or t.end_ts is None:
-                                if chunk_captions:
-                                    chunk_captions[-1]["text"] += t.text
-                                    chunk_captions[-1]["end_ts"] = chunk_audio_length + audio_length
-                                continue
-                            try:
-                                chunk_captions.append({
-                                    "text": t.text,
-                                    "start_ts": full_audio_length + chunk_audio_length + t.start_ts,
-                                    "end_ts": full_audio_length + chunk_audio_length + t.end_ts,
-                                })
-                            except Exception as e:
-                                logger.error(f"Erro processando token: {t}, Erro: {e}")
-                                continue
+                        if result.tokens:
+                            tokens = result.tokens
+                            for t in tokens:
+                                if t.start_ts is None or t.end_ts is None:
+                                    if chunk_captions:
+                                        chunk_captions[-1]["text"] += t.text
+                                        chunk_captions[-1]["end_ts"] = chunk_audio_length + audio_length
+                                    continue
+                                try:
+                                    chunk_captions.append({
+                                        "text": t.text,
+                                        "start_ts": full_audio_length + chunk_audio_length + t.start_ts,
+                                        "end_ts": full_audio_length + chunk_audio_length + t.end_ts,
+                                    })
+                                except Exception as e:
+                                    logger.error(f"Erro processando token: {t}, Erro: {e}")
+                                    continue
                     
-                    chunk_audio_length += audio_length
+                        chunk_audio_length += audio_length
                 
-                # Adicionar dados do chunk ao total
-                all_captions.extend(chunk_captions)
-                all_audio_data.extend(chunk_audio_data)
-                full_audio_length += chunk_audio_length
+                    # Adicionar dados do chunk ao total
+                    all_captions.extend(chunk_captions)
+                    all_audio_data.extend(chunk_audio_data)
+                    full_audio_length += chunk_audio_length
             
             # Concatenar todo o áudio
             if all_audio_data:
@@ -340,23 +391,26 @@ class TTS:
         context_logger.info("Iniciando síntese TTS com Chatterbox (texto processado)")
         
         try:
-            model = ChatterboxTTS.from_pretrained(device=device)
+            model, model_lock, default_conds = self._get_chatterbox()
 
-            if sample_audio_path:
-                wav = model.generate(
-                    processed_text,
-                    audio_prompt_path=sample_audio_path,
-                    exaggeration=exaggeration,
-                    cfg_weight=cfg_weight,
-                    temperature=temperature,
-                )
-            else:
-                wav = model.generate(
-                    processed_text,
-                    exaggeration=exaggeration,
-                    cfg_weight=cfg_weight,
-                    temperature=temperature,
-                )
+            with model_lock, torch.inference_mode():
+                if sample_audio_path:
+                    wav = model.generate(
+                        processed_text,
+                        audio_prompt_path=sample_audio_path,
+                        exaggeration=exaggeration,
+                        cfg_weight=cfg_weight,
+                        temperature=temperature,
+                    )
+                else:
+                    # Volta à voz padrão; um áudio de referência anterior fica em model.conds
+                    model.conds = default_conds
+                    wav = model.generate(
+                        processed_text,
+                        exaggeration=exaggeration,
+                        cfg_weight=cfg_weight,
+                        temperature=temperature,
+                    )
 
             if wav.dim() == 2 and wav.shape[0] == 1:
                 wav = wav.repeat(2, 1)